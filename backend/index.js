@@ -13,7 +13,6 @@ const {
   constructImageUrl,
 } = require("./cloudinaryService");
 const loadEnv = require("./loadEnv");
-const calculateRoadDistance = require("./location");
 const extractLatLngFromLink = require("./extractgmap");
 
 const app = express();
@@ -77,13 +76,21 @@ const MemberSchema = new mongoose.Schema({
   },
   children: [{ type: mongoose.Schema.Types.ObjectId, ref: collectionName }],
   location: {
+    type: { type: String, enum: ["Point"] }, // GeoJSON, indexed 2dsphere
     coordinates: {
       type: [Number], // [longitude, latitude]
       required: false,
+      default: undefined, // members without coordinates have no location at all
     },
   },
   about: { type: String },
+  // Materialized by the importer's --lineage stage, top ancestor first
+  ancestors: [{ type: mongoose.Schema.Types.ObjectId, ref: collectionName }],
+  generation: { type: Number },
+  descendants: { type: Number },
 });
+MemberSchema.index({ location: "2dsphere" }, { name: "location_2dsphere" });
+MemberSchema.index({ ancestors: 1, generation: 1 }, { name: "lineage" });
 
 const Member = mongoose.model(collectionName, MemberSchema, collectionName);
 
@@ -151,6 +158,21 @@ app.get("/api/members/:id", async (req, res) => {
   }
 });
 
+// Whole line of descent in one scan of the lineage index, generation by generation
+app.get("/api/members/:id/descendants", async (req, res) => {
+  try {
+    const descendants = await Member.find({ ancestors: req.params.id }).sort({ generation: 1 });
+    res.json(
+      descendants.map((member) => ({
+        ...member.toObject(),
+        image: member.image ? constructImageUrl(member.image) : null,
+      }))
+    );
+  } catch (err) {
+    res.status(500).json({ message: err.message });
+  }
+});
+
 app.post("/api/members", upload.single("image"), async (req, res) => {
   try {
     const {
@@ -188,7 +210,7 @@ app.post("/api/members", upload.single("image"), async (req, res) => {
       address,
       spouse,
       children: children ? children.split(",") : [],
-      location: { coordinates },
+      location: coordinates.length === 2 ? { type: "Point", coordinates } : undefined,
       about,
     });
     await newMember.save();
@@ -277,12 +299,12 @@ app.put("/api/members/:id", upload.single("image"), async (req, res) => {
 
     // Update location
     if (location === '') {
-        memberToUpdate.location = { coordinates: [] };
+        memberToUpdate.location = undefined;
     } else if (location) {
       try {
         const extractedLocation = await extractLatLngFromLink(location);
         if (extractedLocation && typeof extractedLocation.lat === 'number' && typeof extractedLocation.lng === 'number') {
-            memberToUpdate.location = { coordinates: [extractedLocation.lng, extractedLocation.lat] };
+            memberToUpdate.location = { type: "Point", coordinates: [extractedLocation.lng, extractedLocation.lat] };
         } else {
             console.warn("Could not extract valid coordinates from location link for update:", location);
         }
@@ -399,40 +421,23 @@ app.get("/api/nearby", async (req, res) => {
       .json({ message: "Latitude and longitude are required" });
   }
   try {
-    const members = await Member.find();
-    const nearbyMembers = await Promise.all(
-      members.map(async (member) => {
-        if (
-          !member.location ||
-          !member.location.coordinates ||
-          member.location.coordinates.length !== 2
-        )
-          return null; // Skip members without valid coordinates
-        const [lon, lat] = member.location.coordinates;
-        const distanceResponse = await calculateRoadDistance(
-          parseFloat(lat),
-          parseFloat(lng),
-          lat,
-          lon
-        );
-        // Extract numeric distance from the response
-        const distance = parseFloat(distanceResponse);
-        // Return the member only if the distance is valid
-        if (distance != null && !isNaN(distance)) {
-          return { ...member.toObject(), distance };
-        }
-        return null; // Skip members with invalid distance
-      })
-    );
-    const validMembers = nearbyMembers
-      .filter((member) => member !== null) // Filter out nulls (invalid members)
-      .sort((a, b) => a.distance - b.distance) // Sort by distance (closest first)
-      .map((member) => {
-        if (member.image) {
-          member.image = constructImageUrl(member.image);
-        }
-        return member;
-      });
+    // Served by the location 2dsphere index, closest first, distance in km
+    const nearbyMembers = await Member.aggregate([
+      {
+        $geoNear: {
+          near: { type: "Point", coordinates: [parseFloat(lng), parseFloat(lat)] },
+          distanceField: "distance",
+          distanceMultiplier: 0.001,
+          spherical: true,
+        },
+      },
+    ]);
+    const validMembers = nearbyMembers.map((member) => {
+      if (member.image) {
+        member.image = constructImageUrl(member.image);
+      }
+      return member;
+    });
     res.json(validMembers);
   } catch (err) {
     console.error(err);
@@ -0,0 +1,357 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from itertools import chain
+import pandas as pd
+from bson import ObjectId
+from rich.console import Console
+from rich.table import Table
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+from family_import import (
+    DEFAULT_CHUNK_SIZE, DEFAULT_ROWS_PER_CHUNK, iter_row_chunks, load_identities,
+    import_sequential, import_bulk_chunks, import_incremental, ImportStats, CommandTimer, Links, Member
+)
+from family_import.store import MEMBER_FIELDS
+
+console = Console()
+
+GIVEN_NAMES = [
+    "Sarah", "John", "Grace", "Peter", "Ruth", "David", "Esther", "Joseph", "Mary", "Samuel",
+    "Agnes", "Paul", "Rose", "Moses", "Joan", "Isaac", "Ann", "Simon", "Betty", "Henry",
+    "Lydia", "James", "Harriet", "Robert", "Florence", "Charles", "Jane", "Daniel", "Alice", "Patrick",
+]
+SURNAMES = [
+    "Nakato", "Mukasa", "Namubiru", "Ssemwanga", "Nabirye", "Kato", "Nalwoga", "Mugerwa", "Nansubuga", "Lubega",
+    "Nakimuli", "Kizito", "Namukasa", "Ssekandi", "Nanyonga", "Musoke", "Nakalema", "Wasswa", "Babirye", "Kiggundu",
+]
+OCCUPATIONS = ["Teacher", "Farmer", "Engineer", "Nurse", "Business", "Driver", "Student", "Doctor", "Accountant"]
+MISSING_VALUES = [None, "NIL", "?", "none"]
+
+class CountingCollection:
+    """
+    Wraps a collection and counts the operations the importer sends to it.
+
+    latency adds a fixed delay in seconds per operation, to model the round
+    trip to a remote cluster on top of an in-process stand-in.
+    """
+
+    OPERATIONS = ("find", "find_one", "insert_one", "update_one", "bulk_write", "create_index")
+
+    def __init__(self, collection, latency=0.0):
+        self._collection = collection
+        self._latency = latency
+        self.counts = {name: 0 for name in self.OPERATIONS}
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in self.counts:
+            return attribute
+
+        def counted(*args, **kwargs):
+            self.counts[name] += 1
+            if self._latency:
+                time.sleep(self._latency)
+            return attribute(*args, **kwargs)
+        return counted
+
+    @property
+    def round_trips(self):
+        """The total number of operations sent."""
+        return sum(self.counts.values())
+
+def generate_sheet(path, rows, members_per_row=5, address_ratio=0.5, missing_ratio=0.1, seed=0):
+    """
+    Writes a synthetic family sheet shaped like sample_data.xlsx.
+
+    Every row is a couple and their children. Children of earlier rows come
+    back as the couple of later rows, so the sheet forms a connected tree
+    the way the clan registry does.
+
+    Args:
+        path: The .xlsx or .csv file to write.
+        rows: The number of family rows.
+        members_per_row: The maximum number of members per row (couple included).
+        address_ratio: The share of rows with a numbered multi-member Address cell.
+        missing_ratio: The share of optional cells left empty or set to NIL/?.
+        seed: The random seed, so runs are repeatable.
+
+    Returns:
+        The number of members written.
+    """
+    rng = random.Random(seed)
+    unmarried = []
+    members = 0
+
+    def person():
+        name = f"{rng.choice(GIVEN_NAMES)} {rng.choice(SURNAMES)} {rng.randrange(10000)}"
+        return name, datetime(1900, 1, 1) + timedelta(days=rng.randrange(40000))
+
+    def maybe(value):
+        return rng.choice(MISSING_VALUES) if rng.random() < missing_ratio else value
+
+    header = ["Images", "Name", "Address"]
+    for i in range(1, members_per_row + 1):
+        header += [f"No {i}", f"Name{i}", f"Relation{i}", f"Date of Birth{i}", f"Occupation{i}", f"Phone{i}"]
+
+    def family_rows():
+        nonlocal members
+        for r in range(rows):
+            head = unmarried.pop(rng.randrange(len(unmarried))) if unmarried and rng.random() < 0.7 else person()
+            family = [head, person()] + [person() for _ in range(rng.randrange(members_per_row - 1))]
+            unmarried.extend(family[2:])
+            members += len(family)
+
+            address = None
+            if rng.random() < address_ratio:
+                address = "\n".join(f"{i}. Plot {rng.randrange(1, 500)}.5, Kampala Road {i}" for i in range(1, len(family) + 1))
+            row = [maybe(f"IMG_{r:05d}"), f"{family[0][0]} & {family[1][0]}", address]
+            for i in range(members_per_row):
+                if i < len(family):
+                    name, dob = family[i]
+                    row += [i + 1, name, "", maybe(dob), maybe(rng.choice(OCCUPATIONS)),
+                            maybe(float(rng.randrange(700000000, 799999999)))]
+                else:
+                    row += [None] * 6
+            yield row
+
+    if str(path).endswith(".csv"):
+        import csv
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row in family_rows():
+                writer.writerow([value.strftime("%d/%m/%Y") if isinstance(value, datetime) else value for value in row])
+    else:
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        sheet.append(header)
+        for row in family_rows():
+            sheet.append(row)
+        workbook.save(path)
+    return members
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MB, or None where it cannot be read."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def open_collection(uri, stats=None):
+    """
+    Returns an empty scratch collection on a local mongod, or in mongomock when uri is None.
+
+    On a mongod, the server round trips of the run are recorded into stats.
+    """
+    if uri:
+        from pymongo import MongoClient
+        listeners = [CommandTimer(stats)] if stats is not None else []
+        collection = MongoClient(uri, event_listeners=listeners)["famtree_benchmark"]["budimbe"]
+    else:
+        import mongomock
+        collection = mongomock.MongoClient()["famtree_benchmark"]["budimbe"]
+    collection.drop()
+    return collection
+
+def deep_size(root):
+    """Bytes held by root and the containers, members and links it references, each object counted once."""
+    seen = set()
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+        elif isinstance(obj, Member):
+            stack.extend(getattr(obj, field) for field in Member.__slots__)
+        elif isinstance(obj, Links):
+            stack.extend(vars(obj).values())
+    return total
+
+def _copy(value):
+    """A string of its own, as every cell was before strings were interned."""
+    return value.encode("utf-8").decode("utf-8") if isinstance(value, str) else value
+
+def dict_member(member):
+    """The per-member dict the pipeline used to hold: own strings, a pandas Timestamp and a children list."""
+    doc = {field: _copy(getattr(member, field)) for field in MEMBER_FIELDS}
+    if doc["dob"] is not None:
+        doc["dob"] = pd.Timestamp(doc["dob"])
+    doc["spouse"] = None
+    doc["children"] = []
+    return doc
+
+def dict_links(links):
+    """The _id -> {"children": [...], "spouse": _id} dict Links replaces."""
+    return {member_id: planned for member_id, planned in links.items()}
+
+def measure_member_store(path, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK):
+    """
+    Compares the memory of the parsed members as the compact store and as dicts.
+
+    The whole sheet is held the way a plan run holds it: every row's
+    members, the identity index and the planned links. The same data is
+    then laid out the way the pipeline held it before the store, a dict
+    per member with its own strings and a dict of dicts of links, and both
+    are measured with deep_size.
+
+    Returns:
+        A dict with the members and the dict and compact sizes in MB.
+    """
+    rows = [row for chunk in iter_row_chunks(path, rows_per_chunk=rows_per_chunk) for row in chunk]
+    identities = {}
+    links = Links()
+    for _, _, members in rows:
+        links.add_row([identities.setdefault(member.key, ObjectId()) for member in members])
+
+    compact = deep_size((rows, identities, links))
+    dict_rows = [(index, addresses, [dict_member(member) for member in members]) for index, addresses, members in rows]
+    dict_identities = {(_copy(name_key), dob): member_id for (name_key, dob), member_id in identities.items()}
+    as_dicts = deep_size((dict_rows, dict_identities, dict_links(links)))
+    return {
+        "members": sum(len(members) for _, _, members in rows),
+        "dict_mb": as_dicts / (1024 * 1024),
+        "compact_mb": compact / (1024 * 1024),
+    }
+
+def run_benchmark(path, mode, uri=None, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK, chunk_size=DEFAULT_CHUNK_SIZE,
+                  latency=0.0):
+    """
+    Imports a sheet end to end and measures each stage.
+
+    mongomock looks documents up by scanning, so its import timings grow
+    quadratically with size; use a local mongod (uri) for realistic timings.
+    Round trips are exact on both, and on a mongod the per-command server
+    latencies are reported as well.
+
+    Returns:
+        A dict with per-stage seconds, round trips by operation, rows/sec and
+        the peak traced Python memory of the import.
+    """
+    stats = ImportStats()
+    collection = CountingCollection(open_collection(uri, stats), latency)
+    timings = {}
+
+    started = time.perf_counter()
+    rows = sum(len(chunk) for chunk in iter_row_chunks(path, rows_per_chunk=rows_per_chunk))
+    timings["read_normalize"] = time.perf_counter() - started
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    identities = load_identities(collection)
+    timings["identity_load"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    row_chunks = iter_row_chunks(path, rows_per_chunk=rows_per_chunk, stats=stats)
+    if mode == "sequential":
+        import_sequential(collection, chain.from_iterable(row_chunks), identities, stats)
+    elif mode == "bulk":
+        import_bulk_chunks(collection, row_chunks, identities, chunk_size, stats)
+    else:
+        with tempfile.TemporaryDirectory() as state_dir:
+            import_incremental(collection, lambda: iter_row_chunks(path, rows_per_chunk=rows_per_chunk, stats=stats),
+                               os.path.join(state_dir, "state.json"), identities, chunk_size, stats)
+    timings["import"] = time.perf_counter() - started
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = timings["read_normalize"] + timings["identity_load"] + timings["import"]
+    return {
+        "mode": mode,
+        "rows": rows,
+        "members": collection.count_documents({}),
+        "timings": timings,
+        "rows_per_sec": rows / total if total else 0.0,
+        "stages": dict(stats.stages),
+        "round_trips": collection.round_trips,
+        "operations": collection.counts,
+        "commands": stats.report()["commands"],
+        "traced_peak_mb": traced_peak / (1024 * 1024),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def print_report(results):
+    """Prints one table row per benchmarked mode."""
+    table = Table(title="Import benchmark")
+    for column in ("mode", "rows", "members", "read+normalize s", "identity s", "import s",
+                   "rows/s", "round trips", "traced peak MB", "peak RSS MB"):
+        table.add_column(column, justify="right")
+    for result in results:
+        timings = result["timings"]
+        table.add_row(
+            result["mode"], str(result["rows"]), str(result["members"]),
+            f"{timings['read_normalize']:.2f}", f"{timings['identity_load']:.2f}", f"{timings['import']:.2f}",
+            f"{result['rows_per_sec']:.0f}", str(result["round_trips"]),
+            f"{result['traced_peak_mb']:.1f}",
+            f"{result['peak_rss_mb']:.1f}" if result["peak_rss_mb"] is not None else "n/a",
+        )
+    console.print(table)
+
+    stages = Table(title="Import stages (s)")
+    names = list(dict.fromkeys(name for result in results for name in result["stages"]))
+    for column in ["mode"] + names:
+        stages.add_column(column, justify="right")
+    for result in results:
+        stages.add_row(result["mode"], *(f"{result['stages'].get(name, 0.0):.2f}" for name in names))
+    console.print(stages)
+
+def print_member_store(store):
+    """Prints the memory the compact member store saves over per-member dicts."""
+    saved = 1 - store["compact_mb"] / store["dict_mb"] if store["dict_mb"] else 0.0
+    console.print(f"[blue]Member store for {store['members']} members: {store['dict_mb']:.1f} MB as dicts, "
+                  f"{store['compact_mb']:.1f} MB compact ({saved:.0%} saved)[/blue]")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the family sheet import on synthetic data.")
+    parser.add_argument("--rows", type=int, default=300, help="family rows to generate")
+    parser.add_argument("--members-per-row", type=int, default=5, help="maximum members per row")
+    parser.add_argument("--address-ratio", type=float, default=0.5, help="share of rows with a numbered Address cell")
+    parser.add_argument("--missing-ratio", type=float, default=0.1, help="share of optional cells left empty or NIL")
+    parser.add_argument("--format", choices=["xlsx", "csv"], default="xlsx", help="synthetic sheet format")
+    parser.add_argument("--modes", nargs="+", choices=["sequential", "bulk", "incremental"],
+                        default=["sequential", "bulk", "incremental"], help="import modes to run")
+    parser.add_argument("--uri", help="local mongod URI to use instead of mongomock (uses famtree_benchmark.budimbe)")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated network latency added to every round trip")
+    parser.add_argument("--rows-per-chunk", type=int, default=DEFAULT_ROWS_PER_CHUNK)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        sheet_path = os.path.join(work_dir, f"synthetic.{args.format}")
+        started = time.perf_counter()
+        members = generate_sheet(sheet_path, args.rows, args.members_per_row, args.address_ratio,
+                                 args.missing_ratio, args.seed)
+        console.print(f"[blue]Generated {args.rows} rows / {members} members in "
+                      f"{time.perf_counter() - started:.2f}s[/blue]")
+
+        results = [
+            run_benchmark(sheet_path, mode, args.uri, args.rows_per_chunk, args.chunk_size, args.latency_ms / 1000)
+            for mode in args.modes
+        ]
+        member_store = measure_member_store(sheet_path, args.rows_per_chunk)
+
+    print_report(results)
+    print_member_store(member_store)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"modes": results, "member_store": member_store}, f, indent=2)
@@ -1,9 +1,22 @@
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.exceptions
 import os
+import json
+import hashlib
+import random
+import time
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
 
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is only needed for --preprocess
+    Image = ImageOps = None
+
 load_dotenv()
 
 cloudinary.config(
@@ -12,53 +25,345 @@ cloudinary.config(
   api_secret=os.getenv("CLOUDINARY_API_SECRET")
 )
 
-def upload_image_with_original_filename(image_path, upload_preset):
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+MANIFEST_NAME = ".cloudinary_manifest.json"
+DEFAULT_MAX_DIMENSION = 2048
+DEFAULT_QUALITY = 85
+
+# Failures that will not go away by trying again
+PERMANENT_ERRORS = (
+    cloudinary.exceptions.BadRequest,
+    cloudinary.exceptions.AuthorizationRequired,
+    cloudinary.exceptions.NotAllowed,
+    cloudinary.exceptions.NotFound,
+    cloudinary.exceptions.AlreadyExists,
+    FileNotFoundError,
+    PermissionError,
+)
+
+def upload_image_with_original_filename(image_path, upload_preset, retries=DEFAULT_RETRIES,
+                                        backoff=DEFAULT_BACKOFF, upload_fn=None):
     """
     Uploads a single image to Cloudinary using its original filename.
 
+    Transient failures (rate limits, timeouts, server errors) are retried
+    with exponential backoff and jitter.
+
     Args:
         image_path: The local path to the image file.
         upload_preset: The Cloudinary upload preset to use.
+        retries: How many times to retry a transient failure.
+        backoff: The delay in seconds before the first retry, doubled after each one.
+        upload_fn: Replacement for cloudinary.uploader.upload, e.g. a local stub.
 
     Returns:
         The public_id (which will be the original filename) if successful,
         None otherwise.
     """
+    upload_fn = upload_fn or cloudinary.uploader.upload
+    original_filename = os.path.splitext(os.path.basename(image_path))[0]
+    for attempt in range(retries + 1):
+        try:
+            upload_result = upload_fn(
+                image_path,
+                upload_preset=upload_preset,
+                public_id=original_filename,
+                overwrite=True,
+                invalidate=True,
+                resource_type="auto"
+            )
+            return upload_result["public_id"]
+        except PERMANENT_ERRORS as e:
+            print(f"Error uploading image {image_path}: {e}")
+            return None
+        except Exception as e:
+            if attempt == retries:
+                print(f"Error uploading image {image_path}: {e}")
+                return None
+            delay = backoff * 2 ** attempt + random.uniform(0, backoff)
+            print(f"Retrying {image_path} in {delay:.1f}s after error: {e}")
+            time.sleep(delay)
+
+def file_digest(path, block_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_manifest(manifest_path):
+    """Loads the upload manifest, or an empty one if it is missing or unreadable."""
     try:
-        original_filename = os.path.splitext(os.path.basename(image_path))[0]
-        upload_result = cloudinary.uploader.upload(
-            image_path,
-            upload_preset=upload_preset,
-            public_id=original_filename,
-            overwrite=True,
-            invalidate=True,
-            resource_type="auto"
-        )
-        return upload_result["public_id"]
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest_path, manifest):
+    """Writes the upload manifest atomically."""
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+def preprocess_image(image_path, output_path, max_dimension=DEFAULT_MAX_DIMENSION,
+                     quality=DEFAULT_QUALITY, webp=False):
+    """
+    Prepares a local copy of an image for upload.
+
+    The image is rotated according to its EXIF orientation, shrunk to fit
+    max_dimension, and re-encoded without EXIF metadata (the ICC colour
+    profile is kept). JPEGs stay JPEG at the given quality, other formats
+    become PNG, and webp=True encodes everything as WebP. Animated GIFs are
+    left untouched.
+
+    Args:
+        image_path: The local path to the source image.
+        output_path: The path to write to, without extension.
+        max_dimension: The longest side of the result in pixels.
+        quality: The JPEG/WebP quality from 1 to 95.
+        webp: Encode the result as WebP.
+
+    Returns:
+        The path of the file to upload.
+    """
+    with Image.open(image_path) as img:
+        if img.format == "GIF" and getattr(img, "is_animated", False):
+            return image_path
+        source_format = img.format
+        icc_profile = img.info.get("icc_profile")
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        if webp:
+            image_format, extension = "WEBP", ".webp"
+        elif source_format in ("JPEG", "MPO"):
+            image_format, extension = "JPEG", ".jpg"
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+        else:
+            image_format, extension = "PNG", ".png"
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        output_path += extension
+        img.save(output_path, image_format, quality=quality, optimize=True, icc_profile=icc_profile)
+    return output_path
+
+def preprocess_settings(max_dimension=DEFAULT_MAX_DIMENSION, quality=DEFAULT_QUALITY, webp=False):
+    """The preprocessing options recorded in the manifest, so changing them re-uploads the images."""
+    return {"max_dimension": max_dimension, "quality": quality, "webp": webp}
+
+def unchanged_public_id(image_path, manifest, base_dir, force=False, settings=None):
+    """
+    Looks an image up in the manifest.
+
+    A matching size and mtime means unchanged without reading the file;
+    otherwise the content hash decides. An entry uploaded with other
+    preprocessing settings (None for the original file) counts as changed.
+
+    Returns:
+        The recorded public_id if the image is unchanged, None otherwise,
+        and the content digest if it had to be computed.
+    """
+    key = os.path.relpath(image_path, base_dir).replace(os.sep, "/")
+    entry = manifest.get(key)
+    if not entry or force or entry.get("preprocess") != settings:
+        return None, None
+    stat = os.stat(image_path)
+    if entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["public_id"], None
+    digest = file_digest(image_path)
+    if entry["sha256"] == digest:
+        manifest[key] = {**entry, "mtime": stat.st_mtime}
+        return entry["public_id"], digest
+    return None, digest
+
+def upload_and_record(image_path, upload_path, upload_preset, manifest, base_dir, digest=None, settings=None,
+                      **upload_options):
+    """
+    Uploads upload_path under the name of image_path and records image_path in the manifest.
+
+    Entries always describe the source file, not the prepared copy, plus
+    the preprocessing settings it was prepared with.
+
+    Returns:
+        A (public_id, skipped, uploaded_bytes) tuple as upload_if_changed.
+    """
+    key = os.path.relpath(image_path, base_dir).replace(os.sep, "/")
+    stat = os.stat(image_path)
+    digest = digest or file_digest(image_path)
+    public_id = upload_image_with_original_filename(upload_path, upload_preset, **upload_options)
+    if not public_id:
+        return None, False, 0
+    manifest[key] = {
+        "sha256": digest,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime,
+        "public_id": public_id,
+        "preprocess": settings,
+    }
+    return public_id, False, os.path.getsize(upload_path)
+
+def upload_if_changed(image_path, upload_preset, manifest, base_dir, force=False, prepare=None, settings=None,
+                      **upload_options):
+    """
+    Uploads an image unless the manifest shows the same content was already uploaded.
+
+    See unchanged_public_id for when an image counts as unchanged. The
+    manifest entry, keyed by the path relative to base_dir, is updated after
+    a successful upload.
+
+    Args:
+        prepare: Optional callable mapping the source path to the path to
+            upload, e.g. a preprocessed copy. An image it cannot prepare
+            counts as a failed upload.
+        settings: The preprocessing settings prepare applies, see preprocess_settings.
+
+    Returns:
+        A (public_id, skipped, uploaded_bytes) tuple; public_id is None if the
+        upload failed.
+    """
+    public_id, digest = unchanged_public_id(image_path, manifest, base_dir, force, settings)
+    if public_id is not None:
+        return public_id, True, 0
+    try:
+        upload_path = prepare(image_path) if prepare else image_path
     except Exception as e:
-        print(f"Error uploading image {image_path}: {e}")
-        return None
+        print(f"Error preparing image {image_path}: {e}")
+        return None, False, 0
+    return upload_and_record(image_path, upload_path, upload_preset, manifest, base_dir, digest, settings,
+                             **upload_options)
 
-def upload_folder_images(folder_path, upload_preset):
+def find_images(folder_path):
+    """Lists the image files under a folder in os.walk order."""
+    image_paths = []
+    for root, _, files in os.walk(folder_path):
+        for file in files:
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                image_paths.append(os.path.join(root, file))
+    return image_paths
+
+def print_upload_summary(uploaded, failed, total_bytes, elapsed, skipped=0):
+    """Prints how many images were uploaded or skipped and the achieved throughput."""
+    elapsed = max(elapsed, 1e-9)
+    megabytes = total_bytes / (1024 * 1024)
+    print(f"Uploaded {uploaded} image(s), skipped {skipped} unchanged, {failed} failed, {megabytes:.1f} MB in {elapsed:.1f}s "
+          f"({uploaded / elapsed:.2f} images/s, {megabytes / elapsed:.2f} MB/s)")
+
+def upload_folder_images(folder_path, upload_preset, workers=1, retries=DEFAULT_RETRIES,
+                         backoff=DEFAULT_BACKOFF, upload_fn=None, manifest_path=None, force=False,
+                         preprocess=False, max_dimension=DEFAULT_MAX_DIMENSION, quality=DEFAULT_QUALITY,
+                         webp=False, preprocess_workers=None):
     """
     Uploads all images in a folder to Cloudinary using their original filenames.
 
+    With workers > 1 the uploads run on a thread pool, so the total time is
+    bound by bandwidth rather than per-request latency. Images whose content
+    and preprocessing settings match the folder's manifest are skipped. With
+    preprocess=True every changed image is submitted to a process pool
+    running preprocess_image at once, so resizing and re-encoding use every
+    core, and each is uploaded as soon as it is ready.
+
     Args:
         folder_path: The local path to the folder containing images.
         upload_preset: The Cloudinary upload preset to use.
+        workers: The number of uploads in flight at once.
+        retries: How many times to retry a transient failure per image.
+        backoff: The delay in seconds before the first retry.
+        upload_fn: Replacement for cloudinary.uploader.upload, e.g. a local stub.
+        manifest_path: The manifest file, MANIFEST_NAME inside the folder by default.
+        force: Upload every image even if the manifest shows it unchanged.
+        preprocess: Resize, re-encode and strip metadata before uploading.
+        max_dimension: The longest side of preprocessed images in pixels.
+        quality: The JPEG/WebP quality of preprocessed images.
+        webp: Encode preprocessed images as WebP.
+        preprocess_workers: The preprocessing processes, one per core by default.
 
     Returns:
-        A list of public_ids (filenames) of the uploaded images.
+        A list of public_ids (filenames) of the uploaded and unchanged images,
+        in os.walk order.
     """
-    uploaded_filenames = []
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            if file.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp')):
-                image_path = os.path.join(root, file)
-                filename = upload_image_with_original_filename(image_path, upload_preset)
-                if filename:
-                    uploaded_filenames.append(filename)
-                    print(f"Uploaded: {filename}")
+    if preprocess and Image is None:
+        raise RuntimeError("Image preprocessing requires Pillow: pip install Pillow")
+
+    image_paths = find_images(folder_path)
+    manifest_path = manifest_path or os.path.join(folder_path, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    total = len(image_paths)
+    results = [None] * total
+    uploaded = 0
+    skipped = 0
+    total_bytes = 0
+    started = time.perf_counter()
+    settings = preprocess_settings(max_dimension, quality, webp) if preprocess else None
+    process_pool = ProcessPoolExecutor(max_workers=preprocess_workers) if preprocess else None
+    temp_dir = tempfile.TemporaryDirectory(prefix="cloudinary-upload-") if preprocess else None
+
+    def upload_one(position):
+        return upload_if_changed(
+            image_paths[position], upload_preset, manifest, folder_path, force=force,
+            retries=retries, backoff=backoff, upload_fn=upload_fn
+        )
+
+    def upload_prepared(position, upload_path, digest):
+        return upload_and_record(
+            image_paths[position], upload_path, upload_preset, manifest, folder_path, digest, settings,
+            retries=retries, backoff=backoff, upload_fn=upload_fn
+        )
+
+    def submit_prepared(executor):
+        futures = {}
+        preparing = {}
+        for position, image_path in enumerate(image_paths):
+            public_id, digest = unchanged_public_id(image_path, manifest, folder_path, force, settings)
+            if public_id is not None:
+                results[position] = public_id
+                continue
+            relative_path = os.path.splitext(os.path.relpath(image_path, folder_path))[0]
+            output_path = os.path.join(temp_dir.name, relative_path)
+            future = process_pool.submit(preprocess_image, image_path, output_path, max_dimension, quality, webp)
+            preparing[future] = position, digest
+        for future in as_completed(preparing):
+            position, digest = preparing[future]
+            try:
+                upload_path = future.result()
+            except Exception as e:
+                print(f"Error preparing image {image_paths[position]}: {e}")
+                continue
+            futures[executor.submit(upload_prepared, position, upload_path, digest)] = position
+        return futures
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            if preprocess:
+                futures = submit_prepared(executor)
+                skipped = sum(1 for filename in results if filename)
+            else:
+                futures = {executor.submit(upload_one, position): position for position in range(total)}
+            for done, future in enumerate(as_completed(futures), start=skipped + 1):
+                position = futures[future]
+                filename, unchanged, uploaded_bytes = future.result()
+                results[position] = filename
+                if unchanged:
+                    skipped += 1
+                elif filename:
+                    uploaded += 1
+                    total_bytes += uploaded_bytes
+                    print(f"[{done}/{total}] Uploaded: {filename}")
+    finally:
+        # Keep the progress of a partial run so the next run resumes from it
+        save_manifest(manifest_path, manifest)
+        if process_pool:
+            process_pool.shutdown()
+            temp_dir.cleanup()
+
+    uploaded_filenames = [filename for filename in results if filename]
+    print_upload_summary(uploaded, total - len(uploaded_filenames), total_bytes,
+                         time.perf_counter() - started, skipped=skipped)
     return uploaded_filenames
 
 def construct_image_url(filename):
@@ -67,13 +372,22 @@ def construct_image_url(filename):
     """
     return cloudinary.CloudinaryImage(filename).build_url()
 
-def upload(path, upload_preset):
+def upload(path, upload_preset, workers=1, retries=DEFAULT_RETRIES, upload_fn=None, force=False,
+           **preprocess_options):
     """
     Uploads an image or a folder of images to Cloudinary.
 
+    Files already recorded unchanged in the manifest next to them are not
+    sent again unless force is set. Both accept the preprocessing options of
+    upload_folder_images; a single file is preprocessed in this process.
+
     Args:
         path: The local path to the image file or folder.
         upload_preset: The Cloudinary upload preset to use.
+        workers: The number of concurrent uploads for a folder.
+        retries: How many times to retry a transient failure per image.
+        upload_fn: Replacement for cloudinary.uploader.upload, e.g. a local stub.
+        force: Upload even if the manifest shows the content unchanged.
 
     Returns:
         A single public_id (filename) if a file was uploaded,
@@ -81,19 +395,82 @@ def upload(path, upload_preset):
         or None if the upload failed.
     """
     if os.path.isfile(path):
-        return upload_image_with_original_filename(path, upload_preset)
+        preprocess = preprocess_options.pop("preprocess", False)
+        preprocess_options.pop("preprocess_workers", None)
+        if preprocess and Image is None:
+            raise RuntimeError("Image preprocessing requires Pillow: pip install Pillow")
+        base_dir = os.path.dirname(os.path.abspath(path))
+        manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+        manifest = load_manifest(manifest_path)
+        with tempfile.TemporaryDirectory(prefix="cloudinary-upload-") as temp_dir:
+            def prepare(image_path):
+                output_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(image_path))[0])
+                return preprocess_image(image_path, output_path, **preprocess_options)
+
+            public_id, skipped, _ = upload_if_changed(path, upload_preset, manifest, base_dir, force=force,
+                                                      prepare=prepare if preprocess else None,
+                                                      settings=preprocess_settings(**preprocess_options) if preprocess else None,
+                                                      retries=retries, upload_fn=upload_fn)
+        if skipped:
+            print(f"Skipped unchanged image: {public_id}")
+        save_manifest(manifest_path, manifest)
+        return public_id
     elif os.path.isdir(path):
-        return upload_folder_images(path, upload_preset)
+        return upload_folder_images(path, upload_preset, workers=workers, retries=retries,
+                                    upload_fn=upload_fn, force=force, **preprocess_options)
     else:
         print("Invalid path: Not a file or a folder.")
         return None
 
+def link_images(public_ids=None):
+    """
+    Points the members' image at their uploaded images, see family_import.images.link_member_images.
+
+    family_import, and the pandas stack it loads, is only imported here, so
+    plain uploads do not pay for it.
+    """
+    from family_import.connection import get_collection
+    from family_import.images import link_member_images
+
+    print_link_summary(link_member_images(get_collection(), public_ids))
+
+def print_link_summary(summary):
+    """Prints how many members were pointed at their images and which images are missing."""
+    print(f"Linked {summary['members_updated']} member image(s): {summary['members']} member(s) refer to "
+          f"{summary['public_ids']} image(s), {len(summary['missing'])} not found on Cloudinary")
+    for public_id in summary['missing']:
+        print(f"- missing: {public_id}")
+
 # Example Usage
 if __name__ == "__main__":
-    path_to_upload = r"C:\\xampp\\htdocs\\fam-tree\\my_pics"  # Replace with your path
+    parser = argparse.ArgumentParser(description="Upload an image or a folder of images to Cloudinary.")
+    parser.add_argument("path", nargs="?", default=os.path.join(os.path.dirname(__file__), "..", "my_pics"),
+                        help="image file or folder to upload")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent uploads for a folder")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries per image on transient errors")
+    parser.add_argument("--force", action="store_true", help="re-upload images the manifest shows as unchanged")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="resize, re-encode and strip metadata before uploading")
+    parser.add_argument("--max-dimension", type=int, default=DEFAULT_MAX_DIMENSION,
+                        help="longest side of preprocessed images in pixels")
+    parser.add_argument("--quality", type=int, default=DEFAULT_QUALITY, help="JPEG/WebP quality of preprocessed images")
+    parser.add_argument("--webp", action="store_true", help="encode preprocessed images as WebP")
+    parser.add_argument("--preprocess-workers", type=int, default=None,
+                        help="preprocessing processes (default: one per core)")
+    parser.add_argument("--link", action="store_true",
+                        help="point the members' image at the uploaded images (MONGODB_URI from .env)")
+    parser.add_argument("--link-only", action="store_true",
+                        help="skip uploading and link every image the members refer to")
+    args = parser.parse_args()
     cloudinary_upload_preset = os.getenv("CLOUDINARY_UPLOAD_PRESET")
 
-    result = upload(path_to_upload, cloudinary_upload_preset)
+    if args.link_only:
+        link_images()
+        raise SystemExit(0)
+
+    result = upload(args.path, cloudinary_upload_preset, workers=args.workers, retries=args.retries,
+                    force=args.force, preprocess=args.preprocess, max_dimension=args.max_dimension,
+                    quality=args.quality, webp=args.webp, preprocess_workers=args.preprocess_workers)
 
     if result:
         if isinstance(result, list):
@@ -106,4 +483,8 @@ if __name__ == "__main__":
             url = construct_image_url(result)
             print(f"URL: {url}")
     else:
-        print("Upload failed.")
\ No newline at end of file
+        print("Upload failed.")
+
+    if args.link and result:
+        public_ids = result if isinstance(result, list) else [result]
+        link_images(public_ids)
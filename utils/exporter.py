@@ -0,0 +1,6 @@
+import os
+from family_import.cli import export_main
+
+if __name__ == "__main__":
+    # Load environment variables from parent directory, database from DB_NAME
+    export_main(env_path=os.path.join(os.path.dirname(__file__), "../.env"))
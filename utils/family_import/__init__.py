@@ -0,0 +1,32 @@
+"""Shared import logic for the family sheet extractors."""
+
+from .sheet import SHEET_NAME, clean_field, clean_phone_number, iter_rows, load_sheet, normalize_members
+from .identity import fold_name, identity_key, load_identities
+from .sequential import import_sequential
+from .bulk import DEFAULT_CHUNK_SIZE, import_bulk, import_bulk_chunks
+from .incremental import default_state_path, import_incremental
+from .store import Links, Member
+from .reader import DEFAULT_ROWS_PER_CHUNK, iter_row_chunks, read_chunks
+from .snapshot import build_snapshot, export_snapshot, write_snapshot
+from .instrumentation import CommandTimer, ImportStats, recording
+from .geocode import FakeGeocoder, GeocodeCache, GoogleGeocoder, geocode_members, normalize_address
+from .multi import expand_sources, parse_sheets
+from .plan import ImportPlan, build_plan
+from .duplicates import find_duplicates
+from .export import export_members
+from .lineage import build_lineage, store_lineage
+from .images import link_member_images, public_id_from_image
+from .connection import close_clients, get_client, get_collection
+from .pipeline import MODES, run_import
+
+__all__ = [
+    'SHEET_NAME', 'clean_field', 'clean_phone_number', 'iter_rows', 'load_sheet',
+    'normalize_members', 'fold_name', 'identity_key', 'load_identities', 'import_sequential',
+    'DEFAULT_CHUNK_SIZE', 'import_bulk', 'import_bulk_chunks', 'default_state_path',
+    'import_incremental', 'Links', 'Member', 'DEFAULT_ROWS_PER_CHUNK', 'iter_row_chunks',
+    'read_chunks', 'build_snapshot', 'export_snapshot', 'write_snapshot', 'CommandTimer',
+    'ImportStats', 'recording', 'FakeGeocoder', 'GeocodeCache', 'GoogleGeocoder', 'geocode_members',
+    'normalize_address', 'expand_sources', 'parse_sheets', 'ImportPlan', 'build_plan',
+    'find_duplicates', 'export_members', 'build_lineage', 'store_lineage', 'link_member_images',
+    'public_id_from_image', 'close_clients', 'get_client', 'get_collection', 'MODES', 'run_import',
+]
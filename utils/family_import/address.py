@@ -0,0 +1,54 @@
+import re
+
+# "1." starting a member's part, even glued to the word before it as in
+# "Kampala2.", but not either half of a decimal like "5.5 km" or "Plot 12.5."
+ADDRESS_MARKER = re.compile(r'(?<!\d)(?<!\d\.)(\d+)\.(?!\d)')
+
+# Key of an unnumbered Address cell, shared by every member of the row
+# (member numbers start at 1)
+SHARED_ADDRESS = 0
+
+def _part(text):
+    """Flattens a multi-line address part to one line."""
+    return text.replace('\n', ' ').strip()
+
+def split_addresses(value):
+    """
+    Splits a numbered Address cell ("1. ... 2. ...") into {member index: address}.
+
+    The cell is scanned once with the precompiled ADDRESS_MARKER. A cell
+    without any member numbers is a single address for the whole row and
+    is returned under SHARED_ADDRESS.
+
+    Args:
+        value: The Address cell, NaN or None when empty.
+
+    Returns:
+        A dict of member index -> address, empty for an empty cell.
+    """
+    if value is None or value != value:  # NaN never equals itself
+        return {}
+    text = str(value)
+    addresses = {}
+    index = None
+    start = 0
+    for match in ADDRESS_MARKER.finditer(text):
+        if index is not None:
+            addresses[index] = _part(text[start:match.start()])
+        index = int(match.group(1))
+        start = match.end()
+
+    if index is None:
+        text = _part(text)
+        return {SHARED_ADDRESS: text} if text else {}
+    addresses[index] = _part(text[start:])
+    return addresses
+
+def parse_addresses(series):
+    """Splits a whole Address column, returning one {member index: address} dict per cell."""
+    return [split_addresses(value) for value in series.to_numpy(dtype=object)]
+
+def member_address(addresses, member):
+    """The address of member number `member` in a row, falling back to the row's shared address."""
+    address = addresses.get(member)
+    return address if address is not None else addresses.get(SHARED_ADDRESS)
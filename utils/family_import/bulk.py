@@ -0,0 +1,117 @@
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from .identity import load_identities
+from .instrumentation import ImportStats
+from .relationships import resolve_relationships
+from .store import Links
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def plan_bulk(rows, identities, links):
+    """
+    Plans the member inserts and field updates for a batch of rows in memory.
+
+    Args:
+        rows: (row index, addresses, members) tuples from sheet.iter_rows.
+        identities: The identity_key -> _id dict, updated with new members.
+        links: The store.Links of the import, extended with every row.
+
+    Returns:
+        The full documents of new members in insertion order, a dict of
+        existing _id -> fields to $set, and the inserted names.
+    """
+    new_docs = {}
+    updates = {}
+    inserted = []
+
+    for _, _, members in rows:
+        member_ids = []
+
+        for member_data in members:
+            member_id = identities.get(member_data.key)
+
+            if member_id:
+                # Members inserted earlier in this plan are updated in place
+                update_data = new_docs[member_id] if member_id in new_docs else updates.setdefault(member_id, {})
+                update_data.update(member_data.update_fields())
+            else:
+                member_id = ObjectId()
+                new_docs[member_id] = member_data.document(member_id)
+                identities[member_data.key] = member_id
+                inserted.append(member_data.name)
+
+            member_ids.append(member_id)
+
+        links.add_row(member_ids)
+
+    return new_docs, updates, inserted
+
+def build_operations(new_docs, updates):
+    """Turns the planned state into InsertOne/UpdateOne requests."""
+    operations = [InsertOne(doc) for doc in new_docs.values()]
+    for member_id, update_data in updates.items():
+        operations.append(UpdateOne({"_id": member_id}, {"$set": update_data}))
+    return operations
+
+def flush(collection, operations, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """Sends the operations through unordered bulk_write calls of chunk_size each."""
+    if stats is None:
+        stats = ImportStats()
+    inserted_count = 0
+    modified_count = 0
+    with stats.stage('write'):
+        for start in range(0, len(operations), chunk_size):
+            result = collection.bulk_write(operations[start:start + chunk_size], ordered=False)
+            stats.count('bulk_write')
+            inserted_count += result.inserted_count
+            modified_count += result.modified_count
+    return inserted_count, modified_count
+
+def import_bulk(collection, rows, identities=None, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Imports the sheet with a handful of bulk writes.
+
+    Existing members are resolved through the in-memory identity index, the
+    member inserts and updates are planned in memory and flushed with
+    unordered bulk_write in chunks, and the relationships are written last
+    by resolve_relationships. The final collection state matches
+    import_sequential.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        rows: (row index, addresses, members) tuples from sheet.iter_rows.
+        identities: The identity_key -> _id dict from load_identities,
+            loaded here when not given.
+        chunk_size: The maximum number of operations per bulk_write call.
+        stats: The ImportStats collecting stage timings and operation counts.
+
+    Returns:
+        The names of the inserted members.
+    """
+    return import_bulk_chunks(collection, [rows], identities, chunk_size, stats)
+
+def import_bulk_chunks(collection, row_chunks, identities=None, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Runs the bulk import over streamed chunks of rows.
+
+    Members are planned and flushed one chunk at a time. The identity index
+    is loaded once and carries the members inserted by earlier chunks, while
+    the relationship edges of every chunk are kept and resolved once after
+    the last one.
+    """
+    if stats is None:
+        stats = ImportStats()
+    if identities is None:
+        with stats.stage('dedupe'):
+            identities = load_identities(collection)
+    inserted = []
+    new_ids = []
+    links = Links()
+    for rows in row_chunks:
+        with stats.stage('dedupe'):
+            new_docs, updates, chunk_inserted = plan_bulk(rows, identities, links)
+        flush(collection, build_operations(new_docs, updates), chunk_size, stats)
+        inserted.extend(chunk_inserted)
+        new_ids.extend(new_docs)
+    resolve_relationships(collection, links, new_ids, chunk_size, stats)
+    return inserted
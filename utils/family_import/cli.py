@@ -0,0 +1,265 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from rich.console import Console
+from rich.markup import escape
+from .bulk import DEFAULT_CHUNK_SIZE
+from .connection import COLLECTION_NAME, get_collection, load_uri
+from .duplicates import MAX_BLOCK_SIZE, MIN_SCORE, find_duplicates, write_duplicates
+from .export import CURSOR_BATCH_SIZE, export_members
+from .geocode import DEFAULT_CACHE_PATH, GeocodeCache, GoogleGeocoder
+from .instrumentation import ImportStats, recording
+from .pipeline import run_import
+from .reader import DEFAULT_ROWS_PER_CHUNK
+from .sheet import SHEET_NAME
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_data.xlsx")
+
+# Changes listed by --plan/--dry-run unless --verbose lists them all
+PLAN_PREVIEW = 50
+# Merge candidates listed by the duplicates report unless --limit says otherwise
+DUPLICATES_PREVIEW = 50
+
+console = Console()
+
+def print_plan(plan, chunk_size, limit=PLAN_PREVIEW):
+    """Prints the plan summary and the first `limit` member changes (all when None)."""
+    summary = plan.summary(chunk_size)
+    console.print(f"[bold blue]Plan: {summary['inserts']} insert(s), {summary['updates']} update(s), "
+                  f"{summary['unchanged']} unchanged member(s)[/bold blue]")
+    console.print(f"[blue]  {summary['field_changes']} field change(s), {summary['relationship_changes']} "
+                  f"relationship change(s), {summary['operations']} operation(s) in {summary['bulk_writes']} "
+                  f"bulk_write call(s), ~{summary['estimated_bytes'] / 1024:.1f} KB[/blue]")
+    changes = plan.changes()
+    for change in changes if limit is None else changes[:limit]:
+        color = "green" if change['action'] == 'insert' else "yellow"
+        fields = "; ".join(
+            f"{field}: {value['from']!r} -> {value['to']!r}" for field, value in change['changes'].items()
+        )
+        console.print(f"[{color}]  {change['action']} {escape(str(change['name']))} ({change['dob']}) {escape(fields)}[/{color}]")
+    if limit is not None and len(changes) > limit:
+        console.print(f"[blue]  ... {len(changes) - limit} more, use --verbose or --diff to see them all[/blue]")
+
+def connect(env_path=None, db_name=None):
+    """Opens the members collection on the shared client and pings it, exiting on failure."""
+    try:
+        uri = load_uri(env_path)
+    except RuntimeError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+    try:
+        collection = get_collection(uri, db_name)
+        # Test the connection
+        collection.database.client.admin.command('ping')
+        console.print("[bold green]Successfully connected to MongoDB![/bold green]")
+        console.print(f"[bold blue]Using database: {collection.database.name}, collection: {COLLECTION_NAME}[/bold blue]")
+    except Exception as e:
+        console.print(f"[bold red]Error connecting to MongoDB: {e}[/bold red]")
+        sys.exit(1)
+    return collection
+
+def build_parser():
+    """The command line options shared by the extractor scripts and python -m family_import."""
+    parser = argparse.ArgumentParser(description="Import the family sheet into MongoDB.")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE,
+                        help="path to the .xlsx, .xls, .csv or .parquet family sheet, or a directory or quoted glob of sheets")
+    parser.add_argument("--sheet", default=SHEET_NAME, help="sheet holding the family rows")
+    parser.add_argument("--rows-per-chunk", type=int, default=DEFAULT_ROWS_PER_CHUNK,
+                        help="rows read into memory at a time")
+    parser.add_argument("--workers", type=int,
+                        help="processes parsing a directory or glob of sheets (default: one per CPU)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="resolve members with one query and write with bulk_write instead of per-member round trips")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="operations per bulk_write call in --bulk mode")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only write members of rows added, changed or removed since the last successful run")
+    parser.add_argument("--plan", action="store_true",
+                        help="diff the whole sheet against the collection, print the changes and write them in one bulk pass")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="like --plan, but only print the changes without writing anything")
+    parser.add_argument("--diff", metavar="PATH",
+                        help="write the --plan/--dry-run summary and per-member change list to PATH as JSON")
+    parser.add_argument("--state", metavar="PATH",
+                        help="row fingerprint file for --incremental (default: next to the sheet)")
+    parser.add_argument("--snapshot", metavar="PATH",
+                        help="write a precomputed family graph to PATH (.json, or .msgpack) after importing")
+    parser.add_argument("--geocode", action="store_true",
+                        help="store a GeoJSON location for members whose address changed (Google Geocoding API)")
+    parser.add_argument("--geocode-cache", metavar="PATH", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file caching geocoded addresses across runs")
+    parser.add_argument("--region", help="region bias for --geocode, e.g. ug")
+    parser.add_argument("--lineage", action="store_true",
+                        help="store every member's ancestors, generation and descendant count after importing")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print every row and member as it is processed")
+    parser.add_argument("--report", metavar="PATH",
+                        help="write stage timings and MongoDB command latencies to PATH as JSON")
+    return parser
+
+def main(argv=None, env_path=None, db_name=None):
+    """
+    Runs one import from the command line.
+
+    Args:
+        argv: The arguments, sys.argv by default.
+        env_path: The .env file holding MONGODB_URI, .env in the working directory by default.
+        db_name: The database, DB_NAME from the environment or basajja by default.
+    """
+    args = build_parser().parse_args(argv)
+    collection = connect(env_path, db_name)
+
+    geocoder = geocode_cache = None
+    if args.geocode:
+        try:
+            geocoder = GoogleGeocoder(region=args.region)
+        except RuntimeError as e:
+            console.print(f"[bold red]Error: {e}[/bold red]")
+            sys.exit(1)
+        geocode_cache = GeocodeCache(args.geocode_cache)
+
+    if args.plan or args.dry_run:
+        mode = "plan"
+    else:
+        mode = "incremental" if args.incremental else "bulk" if args.bulk else "sequential"
+    try:
+        result = run_import(
+            Path(args.source), collection, mode,
+            sheet_name=args.sheet,
+            rows_per_chunk=args.rows_per_chunk,
+            chunk_size=args.chunk_size,
+            state_path=args.state,
+            snapshot_path=args.snapshot,
+            geocoder=geocoder,
+            geocode_cache=geocode_cache,
+            lineage=args.lineage,
+            workers=args.workers,
+            dry_run=args.dry_run,
+            verbose=args.verbose,
+        )
+    except FileNotFoundError as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+    if len(result['sources']) > 1:
+        console.print(f"[blue]Imported {len(result['sources'])} sheets[/blue]")
+
+    plan = result['plan']
+    if plan is not None:
+        print_plan(plan, args.chunk_size, None if args.verbose else PLAN_PREVIEW)
+        if args.diff:
+            plan.write(args.diff, args.chunk_size)
+            console.print(f"[blue]Wrote the change list to {args.diff}[/blue]")
+        if args.dry_run:
+            console.print("[yellow]Dry run, nothing was written.[/yellow]")
+            return
+
+    summary = result['summary']
+    if summary is not None:
+        console.print(f"[blue]{summary['rows_added']} row(s) added or changed, {summary['rows_removed']} removed, "
+                      f"{summary['members_written']} member(s) written[/blue]")
+    lineage = result['lineage']
+    if lineage is not None:
+        console.print(f"[blue]Stored the lineage of {lineage['members']} members over {lineage['generations']} "
+                      f"generation(s), {lineage['members_updated']} member(s) updated[/blue]")
+        if lineage['cycles']:
+            names = ", ".join(escape(str(name)) for name in lineage['cycles'])
+            console.print(f"[yellow]{len(lineage['cycles'])} member(s) in or below a parent/child cycle "
+                          f"have no lineage: {names}[/yellow]")
+    geocoded = result['geocode']
+    if geocoded is not None:
+        geocode_cache.close()
+        console.print(f"[blue]Geocoded {geocoded['addresses']} address(es): {geocoded['cache_hits']} cached, "
+                      f"{geocoded['geocoded']} looked up, {geocoded['not_found']} not found, "
+                      f"{geocoded['members_updated']} member location(s) written[/blue]")
+        if geocoded['failed']:
+            console.print(f"[yellow]Geocoding failed for {geocoded['failed']} address(es), they are retried "
+                          f"on the next run: {escape(geocoded['error'])}[/yellow]")
+    if result['snapshot'] is not None:
+        console.print(f"[blue]Wrote family graph snapshot of {len(result['snapshot']['members'])} members "
+                      f"to {args.snapshot}[/blue]")
+
+    for inserted_name in result['inserted']:
+        console.print(f"[green]Inserted: {inserted_name}[/green]")
+    console.print("[green]Family tree data has been successfully inserted into MongoDB.[/green]")
+
+    stats = result['stats']
+    stats.print_summary(console)
+    if args.report:
+        stats.write_report(args.report)
+        console.print(f"[blue]Wrote import report to {args.report}[/blue]")
+
+def export_main(argv=None, env_path=None, db_name=None):
+    """
+    Exports the members collection to a family sheet from the command line.
+
+    Args:
+        argv: The arguments, sys.argv by default.
+        env_path: The .env file holding MONGODB_URI, .env in the working directory by default.
+        db_name: The database, DB_NAME from the environment or basajja by default.
+    """
+    parser = argparse.ArgumentParser(description="Export the members collection to a family sheet.")
+    parser.add_argument("output", nargs="?", default="family_export.xlsx",
+                        help="the .xlsx, .csv or .parquet file to write")
+    parser.add_argument("--rows-per-chunk", type=int, default=DEFAULT_ROWS_PER_CHUNK,
+                        help="rows filled and written at a time")
+    parser.add_argument("--batch-size", type=int, default=CURSOR_BATCH_SIZE,
+                        help="documents per cursor batch")
+    args = parser.parse_args(argv)
+    collection = connect(env_path, db_name)
+
+    stats = ImportStats()
+    try:
+        with recording(stats):
+            summary = export_members(collection, args.output, args.rows_per_chunk, args.batch_size, stats)
+    except (ValueError, RuntimeError) as e:
+        console.print(f"[bold red]Error: {e}[/bold red]")
+        sys.exit(1)
+
+    console.print(f"[green]Exported {summary['members']} members in {summary['rows']} rows "
+                  f"(up to {summary['width']} per row) to {args.output}[/green]")
+    if summary['lost_links']:
+        console.print(f"[yellow]{summary['lost_links']} parent -> child link(s) of parents without a spouse "
+                      f"cannot be written in the sheet layout[/yellow]")
+    stats.print_summary(console, "Export")
+
+def duplicates_main(argv=None, env_path=None, db_name=None):
+    """
+    Reports likely duplicate members from the command line, without merging them.
+
+    Args:
+        argv: The arguments, sys.argv by default.
+        env_path: The .env file holding MONGODB_URI, .env in the working directory by default.
+        db_name: The database, DB_NAME from the environment or basajja by default.
+    """
+    parser = argparse.ArgumentParser(description="List members that are likely recorded more than once.")
+    parser.add_argument("--min-score", type=float, default=MIN_SCORE,
+                        help="lowest confidence (0-1) reported")
+    parser.add_argument("--max-block-size", type=int, default=MAX_BLOCK_SIZE,
+                        help="skip blocking keys shared by more members than this")
+    parser.add_argument("--limit", type=int, default=DUPLICATES_PREVIEW,
+                        help="merge candidates printed, 0 for all")
+    parser.add_argument("--output", metavar="PATH",
+                        help="write the summary and every ranked candidate to PATH as JSON")
+    args = parser.parse_args(argv)
+    collection = connect(env_path, db_name)
+
+    stats = ImportStats()
+    with recording(stats):
+        candidates, summary = find_duplicates(collection, args.min_score, args.max_block_size, stats)
+
+    console.print(f"[bold blue]{summary['candidates']} merge candidate(s) among {summary['members']} members "
+                  f"({summary['comparisons']} comparisons in {summary['blocks']} blocks, "
+                  f"{summary['skipped_blocks']} oversized block(s) skipped)[/bold blue]")
+    for candidate in candidates[:args.limit or None]:
+        first, second = candidate['members']
+        color = "red" if candidate['score'] >= 0.9 else "yellow"
+        console.print(f"[{color}]  {candidate['score']:.3f} {escape(str(first['name']))} ({first['dob']}) <-> "
+                      f"{escape(str(second['name']))} ({second['dob']}): {', '.join(candidate['reasons'])}[/{color}]")
+    if args.limit and len(candidates) > args.limit:
+        console.print(f"[blue]  ... {len(candidates) - args.limit} more, use --limit 0 or --output to see them all[/blue]")
+    if args.output:
+        write_duplicates(args.output, candidates, summary)
+        console.print(f"[blue]Wrote the merge candidates to {args.output}[/blue]")
+    stats.print_summary(console, "Duplicate report")
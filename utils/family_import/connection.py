@@ -0,0 +1,66 @@
+import os
+import threading
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from .instrumentation import CommandTimer
+
+DB_NAME = 'basajja'
+COLLECTION_NAME = 'budimbe'
+SERVER_SELECTION_TIMEOUT_MS = 5000
+
+_clients = {}
+_lock = threading.Lock()
+
+def load_uri(env_path=None):
+    """
+    Reads MONGODB_URI from the environment after loading a .env file.
+
+    Args:
+        env_path: The .env file to load, .env in the working directory by default.
+
+    Returns:
+        The connection string.
+    """
+    load_dotenv(env_path or '.env')
+    uri = os.getenv('MONGODB_URI')
+    if not uri:
+        raise RuntimeError("MONGODB_URI environment variable not found or empty")
+    return uri
+
+def get_client(uri=None, **options):
+    """
+    Returns the shared MongoClient for uri, creating it on first use.
+
+    A MongoClient keeps its own connection pool and is safe to share between
+    threads, so a worker importing many sheets reuses one warm pool instead
+    of connecting per run. Nothing is sent to the server until the first
+    command. options only apply when the client is created.
+
+    Args:
+        uri: The connection string, MONGODB_URI by default.
+        **options: Extra MongoClient options such as maxPoolSize.
+
+    Returns:
+        The pooled MongoClient.
+    """
+    if uri is None:
+        uri = load_uri()
+    with _lock:
+        client = _clients.get(uri)
+        if client is None:
+            options.setdefault('serverSelectionTimeoutMS', SERVER_SELECTION_TIMEOUT_MS)
+            options.setdefault('event_listeners', [CommandTimer()])
+            client = _clients[uri] = MongoClient(uri, **options)
+    return client
+
+def get_collection(uri=None, db_name=None, collection_name=COLLECTION_NAME):
+    """Returns the members collection on the shared client, in DB_NAME (env) or basajja."""
+    db_name = db_name or os.getenv('DB_NAME', DB_NAME)
+    return get_client(uri)[db_name][collection_name]
+
+def close_clients():
+    """Closes every shared client, e.g. when a worker shuts down."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
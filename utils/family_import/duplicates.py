@@ -0,0 +1,208 @@
+import json
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from itertools import combinations
+from .identity import dob_key
+from .instrumentation import ImportStats
+from .graph import family_graph
+
+DUPLICATE_FIELDS = {'name': 1, 'dob': 1, 'spouse': 1, 'children': 1}
+# Candidates scoring lower are not reported
+MIN_SCORE = 0.8
+# Blocks larger than this are too common to say anything and are skipped
+MAX_BLOCK_SIZE = 500
+# Two tokens at least this similar count as the same word misspelt
+TOKEN_MATCH = 0.8
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+NON_WORD = re.compile(r'[^\w]+|_')
+
+def name_tokens(name):
+    """
+    Splits a name into its set of folded words.
+
+    Accents, case and punctuation are dropped, so "Nakato  Sarah" and
+    "sarah NAKATO." give the same tokens.
+    """
+    name = unicodedata.normalize('NFKD', str(name))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return frozenset(NON_WORD.sub(' ', name.casefold()).split())
+
+def soundex(token):
+    """The American Soundex code of a word, e.g. "nakato" and "nakatto" both give N230."""
+    letters = [char for char in token if char.isalpha()]
+    if not letters:
+        return token
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES.get(letters[0], '')
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+def blocking_keys(tokens, dob):
+    """
+    The keys a member is indexed under; only members sharing a key are compared.
+
+    - the sorted words, which catches reordered names;
+    - the sorted Soundex codes of the words, which catches most misspellings;
+    - the date of birth with the code of each word, which catches a word
+      added or dropped between records born the same day.
+    """
+    if not tokens:
+        return []
+    codes = sorted(soundex(token) for token in tokens)
+    keys = [('tokens', ' '.join(sorted(tokens))), ('soundex', ' '.join(codes))]
+    if dob is not None:
+        keys.extend(('dob', dob, code) for code in set(codes))
+    return keys
+
+def name_similarity(tokens, other_tokens):
+    """
+    Scores two token sets between 0 and 1, ignoring word order.
+
+    Every word is paired with its most similar word in the other name, so
+    misspelt words still count as partly matched, and the score averages
+    how much of each name is covered, so an extra middle name costs less
+    than a different surname.
+    """
+    if not tokens or not other_tokens:
+        return 0.0
+    matched = 0.0
+    unmatched = set(other_tokens)
+    for token in sorted(tokens, key=len, reverse=True):
+        best, best_ratio = None, 0.0
+        for other in unmatched:
+            ratio = 1.0 if other == token else SequenceMatcher(None, token, other).ratio()
+            if ratio > best_ratio:
+                best, best_ratio = other, ratio
+        if best is not None and best_ratio >= TOKEN_MATCH:
+            matched += best_ratio
+            unmatched.discard(best)
+    return (matched / len(tokens) + matched / len(other_tokens)) / 2
+
+def score_pair(first, second, name_score, spouses, children, parents):
+    """
+    Combines the name similarity with the dates of birth and family links.
+
+    Returns:
+        The confidence between 0 and 1 and the reasons behind it, or None
+        when the two are directly related and so cannot be the same person.
+    """
+    first_id, second_id = first['_id'], second['_id']
+    if spouses[first_id] == second_id or second_id in children[first_id] or first_id in children[second_id]:
+        return None
+
+    reasons = ['same name' if name_score == 1.0 else f'similar name ({name_score:.2f})']
+    first_dob, second_dob = dob_key(first.get('dob')), dob_key(second.get('dob'))
+    if first_dob is not None and second_dob is not None:
+        if first_dob != second_dob:
+            # Namesakes born on different days are usually different people
+            return name_score * 0.5, reasons + ['different date of birth']
+        score = 0.7 * name_score + 0.3
+        reasons.append('same date of birth')
+    else:
+        # A missing date neither confirms nor rules out a match, so a one
+        # letter typo in a two word name (~0.9 similar) still reaches MIN_SCORE
+        score = 0.95 * name_score
+        reasons.append('date of birth missing')
+
+    shared = []
+    if spouses[first_id] is not None and spouses[first_id] == spouses[second_id]:
+        shared.append('spouse')
+    if set(parents[first_id]) & set(parents[second_id]):
+        shared.append('parent')
+    if set(children[first_id]) & set(children[second_id]):
+        shared.append('child')
+    if shared:
+        score += (1 - score) * 0.5
+        reasons.append('shared ' + ', '.join(shared))
+    return score, reasons
+
+def _describe(doc):
+    dob = dob_key(doc.get('dob'))
+    return {'id': str(doc['_id']), 'name': doc.get('name'), 'dob': dob.date().isoformat() if dob else None}
+
+def find_duplicates(collection, min_score=MIN_SCORE, max_block_size=MAX_BLOCK_SIZE, stats=None):
+    """
+    Lists members that are likely recorded more than once.
+
+    Exact name and date of birth matching misses reordered names, typos and
+    records without a date of birth. Comparing every pair is quadratic, so
+    members are first indexed under a few blocking keys (see blocking_keys)
+    and only members sharing a key are scored, which keeps the work close to
+    linear in the collection size. Nothing is merged; the candidates are
+    meant for review.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        min_score: The lowest confidence reported.
+        max_block_size: Blocks with more members than this are skipped.
+        stats: The ImportStats charged with the "read", "block" and "score" stages.
+
+    Returns:
+        The candidates, most confident first, as dicts with score, reasons
+        and the two members, and a summary dict with the members, blocks,
+        skipped_blocks, comparisons and candidates counts.
+    """
+    if stats is None:
+        stats = ImportStats()
+    with stats.stage('read'):
+        members = {doc['_id']: doc for doc in collection.find({}, DUPLICATE_FIELDS)}
+    stats.count('find')
+
+    with stats.stage('block'):
+        docs = list(members.values())
+        tokens = [name_tokens(doc.get('name', '')) for doc in docs]
+        blocks = defaultdict(list)
+        for position, doc in enumerate(docs):
+            for key in blocking_keys(tokens[position], dob_key(doc.get('dob'))):
+                blocks[key].append(position)
+        pairs = set()
+        skipped = 0
+        for block in blocks.values():
+            if len(block) > max_block_size:
+                skipped += 1
+                continue
+            pairs.update(combinations(block, 2))
+
+    with stats.stage('score'):
+        spouses, children, parents = family_graph(members)
+        candidates = []
+        for first, second in pairs:
+            name_score = name_similarity(tokens[first], tokens[second])
+            if name_score == 0.0:
+                continue
+            scored = score_pair(docs[first], docs[second], name_score, spouses, children, parents)
+            if scored is None or scored[0] < min_score:
+                continue
+            score, reasons = scored
+            candidates.append({
+                'score': round(score, 3),
+                'reasons': reasons,
+                'members': [_describe(docs[first]), _describe(docs[second])],
+            })
+        candidates.sort(key=lambda candidate: (-candidate['score'], candidate['members'][0]['name'] or ''))
+
+    summary = {
+        'members': len(docs),
+        'blocks': len(blocks),
+        'skipped_blocks': skipped,
+        'comparisons': len(pairs),
+        'candidates': len(candidates),
+    }
+    return candidates, summary
+
+def write_duplicates(path, candidates, summary):
+    """Writes the summary and the ranked candidates as JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'summary': summary, 'candidates': candidates}, f, indent=2, default=str)
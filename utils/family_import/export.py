@@ -0,0 +1,253 @@
+import csv
+import os
+from .instrumentation import ImportStats
+from .reader import DEFAULT_ROWS_PER_CHUNK
+from .relationships import LOOKUP_BATCH_SIZE
+from .graph import family_graph, generations
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for .parquet exports
+    pa = pq = None
+
+EXPORT_FORMATS = ('.xlsx', '.csv', '.parquet')
+# Documents per cursor batch while reading the links
+CURSOR_BATCH_SIZE = 10000
+LINK_FIELDS = {'spouse': 1, 'children': 1}
+MEMBER_FIELDS = {'name': 1, 'dob': 1, 'phone': 1, 'occupation': 1, 'address': 1, 'image': 1}
+MEMBER_COLUMNS = ('No ', 'Name', 'Relation', 'Date of Birth', 'Occupation', 'Phone')
+RELATIONS = ('Head', 'Spouse')
+
+def sheet_columns(width):
+    """The sample_data.xlsx header for rows of up to `width` members."""
+    columns = ['Images', 'Name', 'Address']
+    for i in range(1, width + 1):
+        columns += [f'{stub}{i}' for stub in MEMBER_COLUMNS]
+    return columns
+
+def plan_rows(members):
+    """
+    Lays the family graph out as sheet rows, the inverse of Links.add_row.
+
+    Every couple becomes one row with the couple first and the children of
+    either partner after them. Rows are ordered by generation, so a member
+    listed both as a child and as half of a couple ends on their own row,
+    as the extractor's "last row wins" expects. Members in no couple and no
+    couple's children get a row of their own.
+
+    A parent without a spouse cannot be written: the second member of a row
+    is always read back as a spouse. Such parents get their own row and the
+    lost parent -> child edges are counted.
+
+    Args:
+        members: A dict of _id -> document with spouse and children.
+
+    Returns:
+        The rows as lists of member _ids, and the number of parent -> child
+        edges the layout cannot hold.
+    """
+    spouses, children, parents = family_graph(members)
+    generation = generations(members, parents, children, spouses)
+    order = {member_id: position for position, member_id in enumerate(members)}
+
+    def rank(member_id):
+        return generation.get(member_id) is None, generation.get(member_id) or 0, order[member_id]
+
+    rows = []
+    listed = set()
+    couples = set()
+    lost = 0
+    for member_id in sorted(members, key=rank):
+        spouse_id = spouses[member_id]
+        if spouse_id is not None:
+            couple = frozenset((member_id, spouse_id))
+            if couple in couples:
+                continue
+            couples.add(couple)
+            row = [member_id, spouse_id]
+            for child_id in children[member_id] + children[spouse_id]:
+                if child_id not in row:
+                    row.append(child_id)
+            rows.append(row)
+            listed.update(row)
+        elif children[member_id]:
+            lost += len(children[member_id])
+
+    for member_id in sorted(members, key=rank):
+        if member_id not in listed:
+            rows.append([member_id])
+    return rows, lost
+
+def _cell(value):
+    """Blanks the None/NaN placeholders the extractor stores for empty cells."""
+    if value is None or value != value or value == '':
+        return None
+    return value
+
+def sheet_row(row, docs, owners):
+    """
+    Builds the cells of one row from its member documents.
+
+    The extractor gives every member of a row the row's image, and the last
+    row listing a member decides it. The Images cell is therefore the image
+    shared by all `owners`, the members whose last row this is, or empty
+    when they differ. Addresses are numbered by member position as the
+    extractor reads them.
+    """
+    row_docs = [docs[member_id] for member_id in row]
+    names = [str(doc.get('name', '')) for doc in row_docs]
+    images = {_cell(docs[member_id].get('image')) for member_id in owners}
+    image = images.pop() if len(images) == 1 else None
+    address = '\n'.join(
+        f"{position}. {doc['address']}"
+        for position, doc in enumerate(row_docs, start=1)
+        if _cell(doc.get('address'))
+    )
+    cells = [image, ' & '.join(names[:2]), address or None]
+    for position, doc in enumerate(row_docs, start=1):
+        relation = RELATIONS[position - 1] if position <= len(RELATIONS) else 'Child'
+        cells += [position, names[position - 1], relation, _cell(doc.get('dob')),
+                  _cell(doc.get('occupation')), _cell(doc.get('phone'))]
+    return cells
+
+class _CsvWriter:
+    """Writes rows with dates as DD/MM/YYYY, the way the extractor parses them."""
+
+    def __init__(self, path, columns):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(
+            [value.strftime('%d/%m/%Y') if hasattr(value, 'strftime') else value for value in row]
+            for row in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+class _XlsxWriter:
+    """Streams rows through openpyxl's write-only mode."""
+
+    def __init__(self, path, columns):
+        from openpyxl import Workbook
+
+        self._path = path
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('Sheet1')
+        self._sheet.append(columns)
+
+    def write(self, rows):
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._path)
+
+class _ParquetWriter:
+    """Writes one Parquet row group per chunk with a fixed schema."""
+
+    def __init__(self, path, columns):
+        if pq is None:
+            raise RuntimeError("Parquet exports require pyarrow: pip install pyarrow")
+        self._columns = columns
+        self._schema = pa.schema([
+            (column, pa.int64() if column.startswith('No ')
+             else pa.timestamp('ms') if column.startswith('Date of Birth')
+             else pa.string())
+            for column in columns
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write(self, rows):
+        columns = {}
+        for position, field in enumerate(self._schema):
+            values = [row[position] if position < len(row) else None for row in rows]
+            if field.type == pa.string():
+                values = [str(value) if value is not None else None for value in values]
+            columns[field.name] = values
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+WRITERS = {'.csv': _CsvWriter, '.xlsx': _XlsxWriter, '.parquet': _ParquetWriter}
+
+def load_links(collection, batch_size=CURSOR_BATCH_SIZE):
+    """Streams only the spouse and children of every member, in natural order."""
+    return {doc['_id']: doc for doc in collection.find({}, LINK_FIELDS, batch_size=batch_size)}
+
+def load_member_fields(collection, member_ids, batch_size=LOOKUP_BATCH_SIZE):
+    """Reads the sheet fields of the given members with batched $in queries."""
+    docs = {}
+    member_ids = list(member_ids)
+    for start in range(0, len(member_ids), batch_size):
+        batch = member_ids[start:start + batch_size]
+        for doc in collection.find({'_id': {'$in': batch}}, MEMBER_FIELDS, batch_size=batch_size):
+            docs[doc['_id']] = doc
+    return docs
+
+def export_members(collection, path, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK, batch_size=CURSOR_BATCH_SIZE,
+                   stats=None):
+    """
+    Exports the collection back to the family sheet layout.
+
+    The links of every member are streamed once to lay out the rows, then
+    the rows are filled and written rows_per_chunk at a time, fetching only
+    the members of each chunk, so memory holds the links plus one chunk.
+    Importing the file gives back the same members and relationships.
+    Images come back per row, so a member whose image was changed apart
+    from the rest of their family takes the row's image.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        path: The .xlsx, .csv or .parquet file to write.
+        rows_per_chunk: The number of rows filled and written at a time.
+        batch_size: The cursor batch size for reading the links.
+        stats: The ImportStats charged with the "read" and "write" stages.
+
+    Returns:
+        A dict with the rows, members, width (members in the widest row)
+        and lost_links (parent -> child edges of single parents) counts.
+    """
+    extension = os.path.splitext(str(path))[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"Unsupported export format {extension!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    if stats is None:
+        stats = ImportStats()
+
+    with stats.stage('read'):
+        links = load_links(collection, batch_size)
+        rows, lost = plan_rows(links)
+    stats.count('find')
+    width = max((len(row) for row in rows), default=2)
+    last_row = {}
+    for position, row in enumerate(rows):
+        for member_id in row:
+            last_row[member_id] = position
+
+    temp_path = f"{path}.tmp{extension}"
+    writer = WRITERS[extension](temp_path, sheet_columns(width))
+    try:
+        for start in range(0, len(rows), rows_per_chunk):
+            chunk = rows[start:start + rows_per_chunk]
+            with stats.stage('read'):
+                docs = load_member_fields(collection, {member_id for row in chunk for member_id in row})
+            stats.count('find')
+            with stats.stage('write'):
+                writer.write([
+                    sheet_row(row, docs, [member_id for member_id in row if last_row[member_id] == start + offset])
+                    for offset, row in enumerate(chunk)
+                ])
+    finally:
+        writer.close()
+    os.replace(temp_path, path)
+
+    return {
+        'rows': len(rows),
+        'members': len(links),
+        'width': width,
+        'lost_links': lost,
+    }
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+from urllib.request import urlopen
+from pymongo import GEOSPHERE, UpdateOne
+from .instrumentation import ImportStats
+
+DEFAULT_CACHE_PATH = 'geocode_cache.sqlite'
+DEFAULT_GEOCODE_WORKERS = 4
+LOCATION_FIELD = 'location'
+LOCATION_INDEX = 'location_2dsphere'
+# The normalized address the stored location was resolved from
+LOCATION_KEY_FIELD = 'location_key'
+# SQLite allows 999 bound parameters per statement
+CACHE_BATCH_SIZE = 500
+# Quota and key errors (RuntimeError), network errors (URLError is an
+# OSError) and malformed responses fail one address, not the whole run
+GEOCODE_ERRORS = (RuntimeError, OSError, ValueError, KeyError)
+
+def normalize_address(address):
+    """Case-, whitespace- and trailing punctuation-folds an address into its cache key."""
+    return ' '.join(str(address).split()).strip(' ,.;').casefold()
+
+def location_point(lat, lng):
+    """The GeoJSON Point MongoDB's 2dsphere index expects, [longitude, latitude]."""
+    return {'type': 'Point', 'coordinates': [lng, lat]}
+
+class GeocodeCache:
+    """
+    Persistent address -> (lat, lng) store in a local SQLite file.
+
+    Addresses the geocoder could not resolve are stored with empty
+    coordinates, so they are not sent to the remote service again.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS geocode ("
+                "address TEXT PRIMARY KEY, lat REAL, lng REAL, updated_at TEXT)"
+            )
+
+    def get_many(self, keys):
+        """
+        Looks up normalized addresses in batches.
+
+        Returns:
+            A dict of key -> (lat, lng), or None for cached misses. Keys
+            that were never geocoded are left out.
+        """
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), CACHE_BATCH_SIZE):
+                batch = keys[start:start + CACHE_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._connection.execute(
+                    f"SELECT address, lat, lng FROM geocode WHERE address IN ({placeholders})", batch
+                )
+                for address, lat, lng in rows:
+                    found[address] = (lat, lng) if lat is not None else None
+        return found
+
+    def put_many(self, results):
+        """Stores key -> (lat, lng) or None results in one transaction."""
+        updated_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (key, *(point if point is not None else (None, None)), updated_at)
+            for key, point in results.items()
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        self._connection.close()
+
+class GoogleGeocoder:
+    """
+    Resolves addresses with the Google Geocoding API, like backend/extractgmap.js.
+
+    Args:
+        api_key: The API key, GOOGLE_MAPS_API_KEY by default.
+        region: A ccTLD region bias such as "ug".
+        timeout: The request timeout in seconds.
+    """
+
+    URL = 'https://maps.googleapis.com/maps/api/geocode/json'
+
+    def __init__(self, api_key=None, region=None, timeout=10):
+        self.api_key = api_key or os.getenv('GOOGLE_MAPS_API_KEY')
+        if not self.api_key:
+            raise RuntimeError("GOOGLE_MAPS_API_KEY environment variable not found or empty")
+        self.region = region
+        self.timeout = timeout
+
+    def __call__(self, address):
+        """Returns (lat, lng) for the address, or None when it has no match."""
+        params = {'address': address, 'key': self.api_key}
+        if self.region:
+            params['region'] = self.region
+        with urlopen(f"{self.URL}?{urlencode(params)}", timeout=self.timeout) as response:
+            data = json.load(response)
+        if data['status'] == 'ZERO_RESULTS':
+            return None
+        if data['status'] != 'OK':
+            # Quota and key errors must not be cached as misses
+            raise RuntimeError(f"Geocoding failed for {address!r}: {data['status']}")
+        location = data['results'][0]['geometry']['location']
+        return location['lat'], location['lng']
+
+class FakeGeocoder:
+    """
+    Offline geocoder for tests and benchmarks.
+
+    Known addresses resolve to the given points and any other address to a
+    stable point derived from its hash, inside Uganda's bounding box.
+    Every call is recorded in calls.
+
+    Args:
+        locations: Optional dict of address -> (lat, lng) or None.
+    """
+
+    def __init__(self, locations=None):
+        self.locations = {normalize_address(address): point for address, point in (locations or {}).items()}
+        self.calls = []
+
+    def __call__(self, address):
+        self.calls.append(address)
+        key = normalize_address(address)
+        if key in self.locations:
+            return self.locations[key]
+        digest = hashlib.sha1(key.encode('utf-8')).digest()
+        lat = -1.5 + 5.7 * int.from_bytes(digest[:4], 'big') / 2 ** 32
+        lng = 29.5 + 5.5 * int.from_bytes(digest[4:8], 'big') / 2 ** 32
+        return round(lat, 6), round(lng, 6)
+
+def geocode_addresses(addresses, geocoder, cache, workers=DEFAULT_GEOCODE_WORKERS):
+    """
+    Resolves every distinct normalized address once, through the cache.
+
+    Args:
+        addresses: Raw address strings, repeats allowed.
+        geocoder: A callable address -> (lat, lng) or None.
+        cache: The GeocodeCache to read from and fill.
+        workers: Concurrent geocoder requests for cache misses.
+
+    Addresses the geocoder fails on are counted and left out of the
+    results and the cache, so the next run tries them again.
+
+    Returns:
+        A dict of normalized address -> (lat, lng) or None, and a dict with
+        the addresses, cache_hits, geocoded and failed counts and the first
+        error, if any.
+    """
+    # The first spelling of an address is the one sent to the geocoder
+    originals = {}
+    for address in addresses:
+        originals.setdefault(normalize_address(address), address)
+    originals.pop('', None)
+
+    results = cache.get_many(originals)
+    missing = [key for key in originals if key not in results]
+    resolved = {}
+    errors = []
+
+    def lookup(key):
+        try:
+            return geocoder(originals[key])
+        except GEOCODE_ERRORS as e:
+            errors.append(e)
+            return e
+
+    try:
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                for key, point in zip(missing, executor.map(lookup, missing)):
+                    if not isinstance(point, Exception):
+                        resolved[key] = point
+    finally:
+        # Keep what was resolved before a failure for the next run
+        cache.put_many(resolved)
+    results.update(resolved)
+
+    counts = {
+        'addresses': len(originals),
+        'cache_hits': len(originals) - len(missing),
+        'geocoded': len(resolved),
+        'failed': len(missing) - len(resolved),
+        'error': str(errors[0]) if errors else None,
+    }
+    return results, counts
+
+def ensure_location_index(collection):
+    """
+    Creates the 2dsphere index on location.
+
+    Members saved by the backend without coordinates hold an empty
+    {"coordinates": []}, which a 2dsphere index rejects, so those are
+    unset first and two-number locations missing their type get "Point".
+    """
+    collection.update_many({'location.coordinates': {'$size': 0}}, {'$unset': {LOCATION_FIELD: ''}})
+    collection.update_many(
+        {'location.coordinates': {'$size': 2}, 'location.type': {'$exists': False}},
+        {'$set': {'location.type': 'Point'}},
+    )
+    collection.create_index([(LOCATION_FIELD, GEOSPHERE)], name=LOCATION_INDEX)
+
+def geocode_members(collection, geocoder, cache, chunk_size=1000, workers=DEFAULT_GEOCODE_WORKERS, stats=None):
+    """
+    Writes a GeoJSON location for every member whose address changed since it was geocoded.
+
+    Each member's normalized address is kept in location_key, so unchanged
+    addresses are neither geocoded nor written again. Addresses without a
+    match, or that the geocoder failed on, leave the stored location alone.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        geocoder: A callable address -> (lat, lng) or None, e.g. GoogleGeocoder.
+        cache: The GeocodeCache shared across runs.
+        chunk_size: The maximum number of operations per bulk_write call.
+        workers: Concurrent geocoder requests for cache misses.
+        stats: The ImportStats charged with the "geocode" stage.
+
+    Returns:
+        A dict with the addresses, cache_hits, geocoded, failed, not_found
+        and members_updated counts and the first geocoder error.
+    """
+    if stats is None:
+        stats = ImportStats()
+    with stats.stage('geocode'):
+        ensure_location_index(collection)
+        pending = {}
+        for doc in collection.find({'address': {'$nin': [None, '']}}, {'address': 1, LOCATION_KEY_FIELD: 1}):
+            key = normalize_address(doc['address'])
+            if key and key != doc.get(LOCATION_KEY_FIELD):
+                pending[doc['_id']] = (key, doc['address'])
+        stats.count('find')
+
+        results, summary = geocode_addresses((address for _, address in pending.values()), geocoder, cache, workers)
+        operations = [
+            UpdateOne({'_id': member_id}, {'$set': {
+                LOCATION_FIELD: location_point(*results[key]),
+                LOCATION_KEY_FIELD: key,
+            }})
+            for member_id, (key, _) in pending.items()
+            if results.get(key) is not None
+        ]
+        for start in range(0, len(operations), chunk_size):
+            collection.bulk_write(operations[start:start + chunk_size], ordered=False)
+            stats.count('bulk_write')
+
+    summary['not_found'] = sum(1 for point in results.values() if point is None)
+    summary['members_updated'] = len(operations)
+    return summary
@@ -0,0 +1,61 @@
+def family_graph(members):
+    """
+    Reads the spouse, children and parents of every member from their links.
+
+    Links to members that are not in `members` are dropped.
+
+    Args:
+        members: A dict of _id -> document with spouse and children.
+
+    Returns:
+        The _id -> spouse _id (or None), _id -> children and _id -> parents dicts.
+    """
+    spouses = {}
+    children = {}
+    parents = {member_id: [] for member_id in members}
+    for member_id, doc in members.items():
+        spouse_id = doc.get('spouse')
+        spouses[member_id] = spouse_id if spouse_id in members else None
+        children[member_id] = [child_id for child_id in doc.get('children') or [] if child_id in members]
+        for child_id in children[member_id]:
+            parents[child_id].append(member_id)
+    return spouses, children, parents
+
+def topological_order(member_ids, parents, children):
+    """
+    Orders members parents first with Kahn's algorithm.
+
+    Members caught in a parent/child cycle, and everyone below them, never
+    run out of pending parents and are left out.
+    """
+    pending = {member_id: len(parents[member_id]) for member_id in member_ids}
+    order = [member_id for member_id, count in pending.items() if count == 0]
+    for member_id in order:
+        for child_id in children[member_id]:
+            pending[child_id] -= 1
+            if pending[child_id] == 0:
+                order.append(child_id)
+    return order
+
+def generations(member_ids, parents, children, spouses, order=None):
+    """
+    Assigns a generation depth to every member in one topological pass.
+
+    Members without parents start at 0 and children sit one below their
+    deepest parent. Members who married into the family take their spouse's
+    generation. Members caught in a parent/child cycle get None.
+
+    Args:
+        order: The topological_order of the members, computed when not given.
+    """
+    if order is None:
+        order = topological_order(member_ids, parents, children)
+    generation = {}
+    for member_id in order:
+        generation[member_id] = max((generation[parent_id] + 1 for parent_id in parents[member_id]), default=0)
+
+    for member_id in member_ids:
+        spouse_id = spouses[member_id]
+        if not parents[member_id] and spouse_id in generation and parents.get(spouse_id):
+            generation[member_id] = generation[spouse_id]
+    return generation
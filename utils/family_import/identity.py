@@ -0,0 +1,79 @@
+from pymongo import ASCENDING, UpdateOne
+
+IDENTITY_FIELD = 'name_key'
+IDENTITY_INDEX = 'identity'
+
+def fold_name(name):
+    """Case- and whitespace-folds a name so "Sarah  nakato" and "sarah Nakato" share a key."""
+    return ' '.join(str(name).split()).casefold()
+
+def dob_key(dob):
+    """Normalizes a date of birth so sheet Timestamps and stored datetimes compare equal."""
+    if dob is None or dob != dob:  # NaT never equals itself
+        return None
+    if hasattr(dob, 'to_pydatetime'):
+        return dob.to_pydatetime()
+    return dob
+
+def identity_key(name, dob):
+    """The (folded name, dob) pair two records must share to be the same member."""
+    return fold_name(name), dob_key(dob)
+
+def ensure_identity_index(collection):
+    """Creates the compound (name_key, dob) index used for member lookups."""
+    collection.create_index([(IDENTITY_FIELD, ASCENDING), ('dob', ASCENDING)], name=IDENTITY_INDEX)
+
+def _stale_identity(doc):
+    """The update restoring doc's name_key, or None when it matches the stored name."""
+    name_key = fold_name(doc.get('name', ''))
+    if doc.get(IDENTITY_FIELD) == name_key:
+        return None
+    return UpdateOne({'_id': doc['_id']}, {'$set': {IDENTITY_FIELD: name_key}})
+
+def _write_identities(collection, operations, chunk_size):
+    for start in range(0, len(operations), chunk_size):
+        collection.bulk_write(operations[start:start + chunk_size], ordered=False)
+
+def backfill_identity(collection, chunk_size=1000):
+    """
+    Stores name_key on members written before the identity index existed.
+
+    The backend's edit route renames members without touching name_key, so
+    every stored key is checked against the name and rewritten where stale.
+
+    Returns:
+        The number of members that were updated.
+    """
+    operations = [
+        operation for operation in map(_stale_identity, collection.find({}, {'name': 1, IDENTITY_FIELD: 1}))
+        if operation is not None
+    ]
+    _write_identities(collection, operations, chunk_size)
+    return len(operations)
+
+def load_identities(collection, chunk_size=1000):
+    """
+    Prepares the identity index and loads it into memory.
+
+    Every member's key is built from the stored name and dob in one query,
+    so members renamed since their name_key was written are still found,
+    and stale or missing name_keys are rewritten. When stored duplicates
+    share a key the first one in natural order wins, as it did with find_one.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        chunk_size: The maximum number of name_key fixes per bulk_write call.
+
+    Returns:
+        A dict of identity_key -> _id.
+    """
+    ensure_identity_index(collection)
+    identities = {}
+    operations = []
+    for doc in collection.find({}, {'name': 1, IDENTITY_FIELD: 1, 'dob': 1}):
+        operation = _stale_identity(doc)
+        if operation is not None:
+            operations.append(operation)
+        identities.setdefault(identity_key(doc.get('name', ''), doc.get('dob')), doc['_id'])
+    _write_identities(collection, operations, chunk_size)
+    return identities
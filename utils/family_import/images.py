@@ -0,0 +1,120 @@
+import os
+from urllib.parse import urlparse
+from pymongo import UpdateOne
+from .bulk import DEFAULT_CHUNK_SIZE, flush
+from .instrumentation import ImportStats
+
+try:
+    import cloudinary
+    import cloudinary.api
+except ImportError:  # cloudinary is only needed to verify and link uploaded images
+    cloudinary = None
+
+# The most public_ids resources_by_ids accepts in one call
+RESOURCES_BATCH_SIZE = 100
+
+def public_id_from_image(value):
+    """
+    Reads the Cloudinary public_id an Images cell refers to.
+
+    The uploader names every image after its file, so a delivery URL
+    (".../image/upload/v123/IMG_3457.jpg"), a file name ("IMG_3457.JPEG")
+    and a bare public_id ("IMG_3457") all give "IMG_3457".
+
+    Returns:
+        The public_id, or None for an empty cell.
+    """
+    if value is None or value != value:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    path = urlparse(value).path if '://' in value else value
+    # The uploader never uses folders, so the public_id is the last segment
+    # after any transformation and version segments of a delivery URL
+    path = path.replace('\\', '/').rsplit('/', 1)[-1]
+    return os.path.splitext(path)[0] or None
+
+def _lookup_resources(public_ids):
+    return cloudinary.api.resources_by_ids(public_ids, max_results=len(public_ids))['resources']
+
+def verify_public_ids(public_ids, batch_size=RESOURCES_BATCH_SIZE, lookup=None, stats=None):
+    """
+    Checks which public_ids exist on Cloudinary with batched Admin API calls.
+
+    Args:
+        public_ids: The public_ids to check.
+        batch_size: The public_ids per resources_by_ids call, at most 100.
+        lookup: Replacement for resources_by_ids taking a list of public_ids
+            and returning their resource dicts, e.g. a local stub.
+        stats: The ImportStats charged with the "verify" stage.
+
+    Returns:
+        The set of public_ids that exist.
+    """
+    if lookup is None:
+        if cloudinary is None:
+            raise RuntimeError("Linking images requires cloudinary: pip install cloudinary")
+        lookup = _lookup_resources
+    if stats is None:
+        stats = ImportStats()
+    public_ids = sorted(set(public_ids))
+    found = set()
+    with stats.stage('verify'):
+        for start in range(0, len(public_ids), batch_size):
+            batch = public_ids[start:start + batch_size]
+            found.update(resource['public_id'] for resource in lookup(batch))
+            stats.count('resources_by_ids')
+    return found
+
+def link_member_images(collection, public_ids=None, lookup=None, batch_size=RESOURCES_BATCH_SIZE, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Points every member's image at its uploaded Cloudinary image.
+
+    Members are matched to images by the public_id their Images cell refers
+    to (see public_id_from_image) in memory. The referenced public_ids are
+    verified in batches of batch_size, and the members whose image is not
+    yet the bare public_id, which the backend builds URLs from and deletes
+    images by, are updated through unordered bulk_write calls. Images that
+    do not exist are reported and left as they are.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        public_ids: Only link these public_ids, e.g. those returned by
+            upload_folder_images; every image the members refer to by default.
+        lookup: Replacement for resources_by_ids, see verify_public_ids.
+        batch_size: The public_ids per resources_by_ids call.
+        chunk_size: The maximum number of operations per bulk_write call.
+        stats: The ImportStats charged with the "read", "verify" and "write" stages.
+
+    Returns:
+        A dict with the members referring to an image, the public_ids
+        checked, the missing public_ids and the number of members updated.
+    """
+    if stats is None:
+        stats = ImportStats()
+    wanted = set(public_ids) if public_ids is not None else None
+
+    with stats.stage('read'):
+        members = {}
+        for doc in collection.find({'image': {'$nin': [None, '']}}, {'image': 1}):
+            public_id = public_id_from_image(doc['image'])
+            if public_id is not None and (wanted is None or public_id in wanted):
+                members[doc['_id']] = (public_id, doc['image'])
+    stats.count('find')
+
+    referenced = {public_id for public_id, _ in members.values()}
+    found = verify_public_ids(referenced, batch_size, lookup, stats)
+    operations = [
+        UpdateOne({'_id': member_id}, {'$set': {'image': public_id}})
+        for member_id, (public_id, image) in members.items()
+        if public_id in found and image != public_id
+    ]
+    flush(collection, operations, chunk_size, stats)
+
+    return {
+        'members': len(members),
+        'public_ids': len(referenced),
+        'missing': sorted(referenced - found),
+        'members_updated': len(operations),
+    }
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from .bulk import DEFAULT_CHUNK_SIZE, build_operations, flush, plan_bulk
+from .identity import load_identities
+from .instrumentation import ImportStats
+from .relationships import resolve_relationships
+from .store import MEMBER_FIELDS, Links
+
+STATE_SUFFIX = '.fingerprints.json'
+
+def default_state_path(source):
+    """The fingerprint file kept next to the sheet, e.g. sample_data.xlsx.fingerprints.json."""
+    return f"{source}{STATE_SUFFIX}"
+
+def _value(value):
+    """Makes a cleaned member value JSON-serializable for hashing."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat() if value == value else None
+    return value
+
+def row_fingerprint(members):
+    """Hashes the normalized member columns of one row."""
+    payload = [
+        [_value(getattr(member, field)) for field in MEMBER_FIELDS]
+        for member in members
+    ]
+    return hashlib.sha1(json.dumps(payload, default=str).encode('utf-8')).hexdigest()
+
+def _token(key):
+    """Serializes an identity key for the state file."""
+    name, dob = key
+    return [name, dob.isoformat() if dob else None]
+
+def _key(token):
+    """Reads an identity key back from the state file."""
+    name, dob = token
+    return name, datetime.fromisoformat(dob) if dob else None
+
+def load_state(state_path):
+    """Loads the rows recorded by the last successful run, or none for a first run."""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)['rows']
+    except (OSError, ValueError, KeyError):
+        return []
+
+def save_state(state_path, rows):
+    """Records [fingerprint, member keys] for every row of a successful run."""
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump({'rows': rows}, f)
+    os.replace(temp_path, state_path)
+
+def scan_changes(row_chunks, previous_rows, stats=None):
+    """
+    Fingerprints every row and compares them with the previous run.
+
+    Rows are matched by content, so a changed row shows up as one removed
+    and one added fingerprint.
+
+    Returns:
+        The current [fingerprint, member keys] rows, the number of added and
+        removed rows, and the identity keys of every member in them.
+    """
+    if stats is None:
+        stats = ImportStats()
+    current_rows = []
+    for rows in row_chunks:
+        with stats.stage('fingerprint'):
+            for _, _, members in rows:
+                keys = [member.key for member in members]
+                current_rows.append([row_fingerprint(members), [_token(key) for key in keys]])
+
+    previous = Counter(fingerprint for fingerprint, _ in previous_rows)
+    current = Counter(fingerprint for fingerprint, _ in current_rows)
+    added = current - previous
+    removed = previous - current
+
+    dirty_keys = set()
+    for rows, changed in ((current_rows, added), (previous_rows, removed)):
+        remaining = Counter(changed)
+        for fingerprint, tokens in rows:
+            if remaining[fingerprint]:
+                remaining[fingerprint] -= 1
+                dirty_keys.update(_key(token) for token in tokens)
+
+    return current_rows, sum(added.values()), sum(removed.values()), dirty_keys
+
+def import_incremental(collection, make_row_chunks, state_path, identities=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                       stats=None):
+    """
+    Re-imports only the members of rows that changed since the last run.
+
+    A member's final state depends only on the rows that contain it, so the
+    whole sheet is planned in memory as import_bulk would, but only members
+    from added, changed or removed rows (and new members) are written, and
+    only their relationships are resolved. The result matches a full import
+    as long as the collection was not edited in between. The fingerprints
+    are saved once everything is written.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        make_row_chunks: A callable returning a fresh iterator of row chunks
+            (see reader.iter_row_chunks); the sheet is streamed twice.
+        state_path: The fingerprint file of the last successful run.
+        identities: The identity_key -> _id dict, loaded here when not given.
+        chunk_size: The maximum number of operations per bulk_write call.
+        stats: The ImportStats collecting stage timings and operation counts.
+
+    Returns:
+        The inserted names and a dict of row and member counts.
+    """
+    if stats is None:
+        stats = ImportStats()
+    current_rows, added, removed, dirty_keys = scan_changes(make_row_chunks(), load_state(state_path), stats)
+    summary = {
+        'rows': len(current_rows),
+        'rows_added': added,
+        'rows_removed': removed,
+        'members_written': 0,
+        'links_written': 0,
+    }
+    inserted = []
+
+    if dirty_keys:
+        if identities is None:
+            with stats.stage('dedupe'):
+                identities = load_identities(collection)
+        new_ids = []
+        links = Links()
+        for rows in make_row_chunks():
+            with stats.stage('dedupe'):
+                new_docs, updates, chunk_inserted = plan_bulk(rows, identities, links)
+                dirty_ids = {identities[key] for key in dirty_keys if key in identities}
+                updates = {member_id: fields for member_id, fields in updates.items() if member_id in dirty_ids}
+            flush(collection, build_operations(new_docs, updates), chunk_size, stats)
+            inserted.extend(chunk_inserted)
+            new_ids.extend(new_docs)
+            summary['members_written'] += len(new_docs) + len(updates)
+
+        dirty_ids = {identities[key] for key in dirty_keys if key in identities}
+        dirty_ids.update(new_ids)
+        links = {member_id: planned for member_id, planned in links.items() if member_id in dirty_ids}
+        summary['links_written'] = resolve_relationships(collection, links, new_ids, chunk_size, stats)
+
+    save_state(state_path, current_rows)
+    return inserted, summary
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pymongo import monitoring
+
+_active = threading.local()
+
+@contextmanager
+def recording(stats):
+    """
+    Routes the commands this thread sends through a shared client to stats.
+
+    Clients created by connection.get_client carry one CommandTimer for
+    their whole life, so each run marks its own ImportStats as active.
+    """
+    previous = getattr(_active, 'stats', None)
+    _active.stats = stats
+    try:
+        yield stats
+    finally:
+        _active.stats = previous
+
+class ImportStats:
+    """
+    Collects stage timings and MongoDB command statistics for one import run.
+
+    Stages are accumulated, so a stage entered once per chunk reports its
+    total time. Command counts and latencies come from CommandTimer.
+    """
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.operations = defaultdict(int)
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(int)
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block and adds it to the named stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        self.stages[name] += seconds
+
+    def count(self, operation, n=1):
+        """Counts an operation the importer issued, e.g. insert_one or bulk_write."""
+        with self._lock:
+            self.operations[operation] += n
+
+    def record_command(self, command_name, seconds, failed=False):
+        """Records the server round trip of one command."""
+        with self._lock:
+            self.latencies[command_name].append(seconds)
+            if failed:
+                self.failures[command_name] += 1
+
+    def timed_iter(self, name, iterable):
+        """Yields from iterable, charging the time spent producing each item to the named stage."""
+        iterator = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add_time(name, time.perf_counter() - started)
+                return
+            self.add_time(name, time.perf_counter() - started)
+            yield item
+
+    def report(self):
+        """Returns the run statistics as a JSON-serializable dict."""
+        commands = {}
+        for command_name, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            commands[command_name] = {
+                'count': len(ordered),
+                'failed': self.failures.get(command_name, 0),
+                'total_ms': sum(ordered) * 1000,
+                'mean_ms': sum(ordered) / len(ordered) * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max_ms': ordered[-1] * 1000,
+            }
+        return {
+            'elapsed_s': time.perf_counter() - self.started,
+            'stages_s': dict(self.stages),
+            'operations': dict(self.operations),
+            'round_trips': sum(len(latencies) for latencies in self.latencies.values()),
+            'commands': commands,
+        }
+
+    def print_summary(self, console, title="Import"):
+        """Prints the end-of-run summary with rich, headed "<title> finished in ...s"."""
+        report = self.report()
+        console.print(f"[bold blue]{title} finished in {report['elapsed_s']:.2f}s[/bold blue]")
+        for name, seconds in report['stages_s'].items():
+            console.print(f"[blue]  {name:<10} {seconds:8.2f}s[/blue]")
+        if report['operations']:
+            operations = ", ".join(f"{name}={count}" for name, count in sorted(report['operations'].items()))
+            console.print(f"[blue]  operations: {operations}[/blue]")
+        for command_name, command in sorted(report['commands'].items()):
+            console.print(f"[blue]  {command_name:<14} x{command['count']:<6} mean {command['mean_ms']:.1f}ms "
+                          f"p95 {command['p95_ms']:.1f}ms max {command['max_ms']:.1f}ms[/blue]")
+
+    def write_report(self, path):
+        """Writes report() as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+class CommandTimer(monitoring.CommandListener):
+    """
+    pymongo command listener feeding server round trips into ImportStats.
+
+    Register it with MongoClient(uri, event_listeners=[CommandTimer(stats)]).
+    Without stats, commands go to the ImportStats made active on the
+    calling thread with recording(), and are dropped outside of one.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+
+    def _target(self):
+        return self.stats if self.stats is not None else getattr(_active, 'stats', None)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        stats = self._target()
+        if stats is not None:
+            stats.record_command(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        stats = self._target()
+        if stats is not None:
+            stats.record_command(event.command_name, event.duration_micros / 1e6, failed=True)
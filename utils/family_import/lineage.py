@@ -0,0 +1,112 @@
+from pymongo import ASCENDING, UpdateOne
+from .bulk import DEFAULT_CHUNK_SIZE, flush
+from .instrumentation import ImportStats
+from .graph import family_graph, generations, topological_order
+
+ANCESTORS_FIELD = 'ancestors'
+GENERATION_FIELD = 'generation'
+DESCENDANTS_FIELD = 'descendants'
+LINEAGE_INDEX = 'lineage'
+LINEAGE_PROJECTION = {
+    'name': 1, 'spouse': 1, 'children': 1,
+    ANCESTORS_FIELD: 1, GENERATION_FIELD: 1, DESCENDANTS_FIELD: 1,
+}
+
+def build_lineage(members):
+    """
+    Materializes every member's ancestors, generation and descendant count.
+
+    One topological pass over the family graph gives each member the
+    ancestors of their parents plus the parents themselves, ordered from
+    the top ancestor down, so a member's whole line of descent is the
+    members whose ancestors contain them. Descendants are counted once
+    each, even when they descend through both parents.
+
+    Members caught in a parent/child cycle, and everyone below them, cannot
+    be ordered: they get no ancestors, no generation and no descendants and
+    are returned for fixing.
+
+    Args:
+        members: A dict of _id -> document with spouse and children.
+
+    Returns:
+        A dict of _id -> {ancestors, generation, descendants} and the _ids
+        of the members left out by a cycle.
+    """
+    spouses, children, parents = family_graph(members)
+    order = topological_order(members, parents, children)
+    generation = generations(members, parents, children, spouses, order)
+
+    ancestors = {}
+    for member_id in order:
+        lineage = {}
+        for parent_id in parents[member_id]:
+            lineage.update(dict.fromkeys(ancestors[parent_id]))
+            lineage[parent_id] = None
+        # Top ancestor first; generations are set for every ordered member
+        ancestors[member_id] = sorted(lineage, key=generation.get)
+
+    descendants = dict.fromkeys(members, 0)
+    for member_id in order:
+        for ancestor_id in ancestors[member_id]:
+            descendants[ancestor_id] += 1
+
+    lineage = {
+        member_id: {
+            ANCESTORS_FIELD: ancestors.get(member_id, []),
+            GENERATION_FIELD: generation.get(member_id),
+            DESCENDANTS_FIELD: descendants[member_id],
+        }
+        for member_id in members
+    }
+    ordered = set(order)
+    return lineage, [member_id for member_id in members if member_id not in ordered]
+
+def ensure_lineage_index(collection):
+    """
+    Creates the (ancestors, generation) index.
+
+    ancestors is an array, so the index is multikey: find({'ancestors': id})
+    returns a member's whole line of descent from one index scan, already
+    in generation order, instead of following children level by level.
+    """
+    collection.create_index([(ANCESTORS_FIELD, ASCENDING), (GENERATION_FIELD, ASCENDING)], name=LINEAGE_INDEX)
+
+def store_lineage(collection, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """
+    Computes the lineage of every member and stores what changed.
+
+    The collection is read once, the lineage is built in memory and only
+    members whose ancestors, generation or descendants differ from the
+    stored values are written, with unordered bulk_write calls.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        chunk_size: The maximum number of operations per bulk_write call.
+        stats: The ImportStats charged with the "lineage" and "write" stages.
+
+    Returns:
+        A dict with the members, members_updated and generations counts and
+        the names of the members caught in a parent/child cycle.
+    """
+    if stats is None:
+        stats = ImportStats()
+    with stats.stage('lineage'):
+        members = {doc['_id']: doc for doc in collection.find({}, LINEAGE_PROJECTION)}
+        stats.count('find')
+        lineage, cyclic = build_lineage(members)
+        operations = [
+            UpdateOne({'_id': member_id}, {'$set': fields})
+            for member_id, fields in lineage.items()
+            if any(members[member_id].get(field) != value for field, value in fields.items())
+        ]
+        ensure_lineage_index(collection)
+    flush(collection, operations, chunk_size, stats)
+
+    depths = [fields[GENERATION_FIELD] for fields in lineage.values() if fields[GENERATION_FIELD] is not None]
+    return {
+        'members': len(members),
+        'members_updated': len(operations),
+        'generations': max(depths, default=-1) + 1,
+        'cycles': [members[member_id].get('name') for member_id in cyclic],
+    }
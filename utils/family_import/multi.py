@@ -0,0 +1,104 @@
+import glob
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from .incremental import default_state_path
+from .instrumentation import ImportStats
+from .reader import DEFAULT_ROWS_PER_CHUNK, iter_row_chunks
+from .sheet import SHEET_NAME
+
+SHEET_EXTENSIONS = ('.xlsx', '.xlsm', '.xls', '.csv', '.parquet')
+
+def is_batch_source(source):
+    """True when source names several sheets: a directory or a glob pattern."""
+    source = str(source)
+    return os.path.isdir(source) or any(char in source for char in '*?[')
+
+def expand_sources(source):
+    """
+    Lists the family sheets a source names, sorted by path.
+
+    Args:
+        source: A sheet, a directory of sheets or a glob such as "branches/*.xlsx".
+
+    Returns:
+        The sheet paths. Excel lock files (~$...) and other file types are skipped.
+    """
+    source = str(source)
+    if not is_batch_source(source):
+        return [source]
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source)
+    return sorted(
+        path for path in paths
+        if os.path.isfile(path)
+        and path.lower().endswith(SHEET_EXTENSIONS)
+        and not os.path.basename(path).startswith('~$')
+    )
+
+def batch_state_path(source):
+    """The --incremental fingerprint file of a batch, next to its directory, e.g. branches.fingerprints.json."""
+    source = str(source)
+    directory = source if os.path.isdir(source) else os.path.dirname(source) or '.'
+    return default_state_path(os.path.abspath(directory))
+
+def _parse_sheet(path, sheet_name, rows_per_chunk):
+    """Reads and normalizes one sheet in a worker process, returning its chunks and stage timings."""
+    stats = ImportStats()
+    chunks = list(iter_row_chunks(path, sheet_name, rows_per_chunk, stats))
+    return chunks, dict(stats.stages)
+
+def _collect(future, stats):
+    """Waits for a worker's sheet and charges its read and normalize time to stats."""
+    with stats.stage('parse'):
+        chunks, stages = future.result()
+    for name, seconds in stages.items():
+        stats.add_time(name, seconds)
+    return chunks
+
+def parse_sheets(paths, sheet_name=SHEET_NAME, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK, workers=None, stats=None):
+    """
+    Reads and normalizes several sheets across a process pool.
+
+    Sheets are parsed concurrently but their row chunks are yielded in path
+    order, so importing them gives the same result as importing the files
+    one after another. Only parsing runs in the workers; deduplication and
+    writes stay with the caller's single import stage and connection pool.
+
+    At most `workers` sheets are submitted ahead of the one being yielded,
+    so a slow write stage holds a few parsed sheets, not the whole batch.
+
+    Args:
+        paths: The sheet paths, e.g. from expand_sources.
+        sheet_name: The sheet holding the family rows (ignored for CSV).
+        rows_per_chunk: The maximum number of rows per chunk.
+        workers: The number of worker processes, one per CPU by default.
+            With one worker or one sheet, parsing stays in this process.
+        stats: The ImportStats charged with waiting for the workers ("parse")
+            and with the workers' own "read" and "normalize" time, summed
+            over the processes.
+
+    Yields:
+        Lists of (row index, addresses, members), as iter_row_chunks does.
+    """
+    if stats is None:
+        stats = ImportStats()
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield from iter_row_chunks(path, sheet_name, rows_per_chunk, stats)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for path in paths:
+            pending.append(executor.submit(_parse_sheet, path, sheet_name, rows_per_chunk))
+            if len(pending) == workers:
+                yield from _collect(pending.popleft(), stats)
+        while pending:
+            yield from _collect(pending.popleft(), stats)
@@ -0,0 +1,120 @@
+from itertools import chain
+from .bulk import DEFAULT_CHUNK_SIZE, import_bulk_chunks
+from .connection import get_collection
+from .geocode import DEFAULT_CACHE_PATH, GeocodeCache, geocode_members
+from .incremental import default_state_path, import_incremental
+from .instrumentation import ImportStats, recording
+from .lineage import store_lineage
+from .multi import batch_state_path, expand_sources, is_batch_source, parse_sheets
+from .plan import build_plan
+from .reader import DEFAULT_ROWS_PER_CHUNK, iter_row_chunks
+from .sequential import import_sequential
+from .sheet import SHEET_NAME
+from .snapshot import export_snapshot
+
+MODES = ('sequential', 'bulk', 'incremental', 'plan')
+
+def run_import(source, collection=None, mode='sequential', sheet_name=SHEET_NAME,
+               rows_per_chunk=DEFAULT_ROWS_PER_CHUNK, chunk_size=DEFAULT_CHUNK_SIZE, state_path=None,
+               snapshot_path=None, geocoder=None, geocode_cache=None, lineage=False, workers=None, dry_run=False, stats=None,
+               verbose=False):
+    """
+    Imports one family sheet into MongoDB.
+
+    Nothing is read or connected until this is called, so a long-running
+    worker can import many sheets through one pooled client.
+
+    A directory or glob imports a batch of sheets: they are parsed across a
+    process pool and their members merged through one dedupe and write
+    stage, as if the sheets had been one file.
+
+    Args:
+        source: The path to a .xlsx, .xls, .csv or .parquet family sheet, or a
+            directory or glob of them.
+        collection: The pymongo collection holding the members, the shared
+            connection.get_collection() by default.
+        mode: "sequential" (per-member writes), "bulk", "incremental" or
+            "plan" (diff the whole sheet against the collection first, then
+            write only the changes in one bulk pass).
+        sheet_name: The sheet holding the family rows (ignored for CSV).
+        rows_per_chunk: The maximum number of rows held in memory at a time.
+        chunk_size: The maximum number of operations per bulk_write call.
+        state_path: The fingerprint file for incremental mode, next to the
+            sheet (or the batch directory) by default.
+        snapshot_path: Write a family graph snapshot here after importing.
+        geocoder: Geocode changed member addresses after importing with this
+            callable address -> (lat, lng) or None, e.g. GoogleGeocoder.
+        geocode_cache: The GeocodeCache for geocoder, DEFAULT_CACHE_PATH by default.
+        lineage: Store every member's ancestors, generation and descendant
+            count after importing (see lineage.store_lineage).
+        workers: The number of processes parsing a batch, one per CPU by default.
+        dry_run: In plan mode, compute the plan without writing anything;
+            the lineage, geocoding and the snapshot are skipped as well.
+        stats: The ImportStats to record into, a new one by default.
+        verbose: Print every row and member in sequential mode.
+
+    Returns:
+        A dict with the imported sheet paths, the inserted names, the incremental summary (None in
+        the other modes), the ImportPlan (plan mode only), the lineage and
+        geocoding summaries and the snapshot (None unless requested), and the
+        ImportStats of the run.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown import mode {mode!r}, expected one of {', '.join(MODES)}")
+    if dry_run and mode != 'plan':
+        raise ValueError("dry_run needs the plan mode")
+    if collection is None:
+        collection = get_collection()
+    if stats is None:
+        stats = ImportStats()
+
+    if is_batch_source(source):
+        sources = expand_sources(source)
+        if not sources:
+            raise FileNotFoundError(f"No family sheets found in {source}")
+        state_path = state_path or batch_state_path(source)
+        # Incremental mode reads the rows twice; the batch is parsed again rather than held
+        def row_chunks():
+            return parse_sheets(sources, sheet_name, rows_per_chunk, workers, stats)
+    else:
+        sources = [source]
+        state_path = state_path or default_state_path(source)
+
+        def row_chunks():
+            return iter_row_chunks(source, sheet_name=sheet_name, rows_per_chunk=rows_per_chunk, stats=stats)
+
+    summary = None
+    plan = None
+    lineage_summary = None
+    geocoded = None
+    snapshot = None
+    with recording(stats):
+        if mode == 'incremental':
+            inserted, summary = import_incremental(collection, row_chunks, state_path,
+                                                   chunk_size=chunk_size, stats=stats)
+        elif mode == 'plan':
+            plan = build_plan(collection, row_chunks(), stats)
+            inserted = plan.inserted
+            if not dry_run:
+                plan.apply(collection, chunk_size, stats)
+        elif mode == 'bulk':
+            inserted = import_bulk_chunks(collection, row_chunks(), chunk_size=chunk_size, stats=stats)
+        else:
+            inserted = import_sequential(collection, chain.from_iterable(row_chunks()), stats=stats, verbose=verbose)
+
+        if lineage and not dry_run:
+            lineage_summary = store_lineage(collection, chunk_size, stats)
+
+        if geocoder is not None and not dry_run:
+            cache = geocode_cache if geocode_cache is not None else GeocodeCache(DEFAULT_CACHE_PATH)
+            try:
+                geocoded = geocode_members(collection, geocoder, cache, chunk_size, stats=stats)
+            finally:
+                if geocode_cache is None:
+                    cache.close()
+
+        if snapshot_path and not dry_run:
+            with stats.stage('snapshot'):
+                snapshot = export_snapshot(collection, snapshot_path)
+
+    return {'sources': sources, 'inserted': inserted, 'summary': summary, 'plan': plan, 'lineage': lineage_summary, 'geocode': geocoded, 'snapshot': snapshot, 'stats': stats}
@@ -0,0 +1,211 @@
+import json
+import bson
+from pymongo import InsertOne, UpdateOne
+from .bulk import DEFAULT_CHUNK_SIZE, flush, plan_bulk
+from .identity import IDENTITY_FIELD, backfill_identity, ensure_identity_index, identity_key
+from .instrumentation import ImportStats
+from .relationships import link_changes
+from .store import Links
+
+PLAN_PROJECTION = {
+    'name': 1, 'dob': 1, IDENTITY_FIELD: 1, 'phone': 1, 'occupation': 1,
+    'address': 1, 'image': 1, 'spouse': 1, 'children': 1,
+}
+
+def load_members(collection):
+    """
+    Reads every member once for planning, without writing anything.
+
+    Unlike load_identities this neither creates the index nor back-fills
+    name_key. Keys are built from the stored name, as load_identities does,
+    so members renamed by the backend are matched by their current name.
+
+    Returns:
+        A dict of _id -> stored document and the identity_key -> _id dict,
+        where the first stored duplicate wins as in load_identities.
+    """
+    members = {}
+    identities = {}
+    for doc in collection.find({}, PLAN_PROJECTION):
+        members[doc['_id']] = doc
+        identities.setdefault(identity_key(doc.get('name', ''), doc.get('dob')), doc['_id'])
+    return members, identities
+
+def _plain(value):
+    """Makes a document value JSON-friendly for the change list."""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat() if value == value else None
+    return value
+
+class ImportPlan:
+    """
+    The inserts, field updates and relationship edits a sheet implies.
+
+    Attributes:
+        members: The stored documents the plan was computed against, by _id.
+        new_docs: The full document of every new member, relationships included.
+        updates: _id -> the fields of an existing member that change, with their new values.
+        inserted: The names of the new members.
+        unchanged: The number of existing members in the sheet that need no write.
+    """
+
+    def __init__(self, members, new_docs, updates, inserted, unchanged):
+        self.members = members
+        self.new_docs = new_docs
+        self.updates = updates
+        self.inserted = inserted
+        self.unchanged = unchanged
+
+    def _name(self, member_id):
+        doc = self.new_docs.get(member_id) or self.members.get(member_id) or {}
+        return doc.get('name', str(member_id))
+
+    def _value(self, field, value):
+        """Shows relationship ids as member names."""
+        if field == 'spouse':
+            return self._name(value) if value is not None else None
+        if field == 'children':
+            return [self._name(child_id) for child_id in value or []]
+        return _plain(value)
+
+    def operations(self):
+        """The InsertOne/UpdateOne requests that apply the plan."""
+        operations = [InsertOne(doc) for doc in self.new_docs.values()]
+        for member_id, update_data in self.updates.items():
+            operations.append(UpdateOne({'_id': member_id}, {'$set': update_data}))
+        return operations
+
+    def summary(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Counts the planned writes and estimates their size on the wire."""
+        fields = [field for update_data in self.updates.values() for field in update_data]
+        relationship_fields = sum(1 for field in fields if field in ('spouse', 'children'))
+        operations = len(self.new_docs) + len(self.updates)
+        estimated_bytes = sum(len(bson.encode(doc)) for doc in self.new_docs.values())
+        estimated_bytes += sum(
+            len(bson.encode({'q': {'_id': member_id}, 'u': {'$set': update_data}}))
+            for member_id, update_data in self.updates.items()
+        )
+        return {
+            'inserts': len(self.new_docs),
+            'updates': len(self.updates),
+            'unchanged': self.unchanged,
+            'field_changes': len(fields) - relationship_fields,
+            'relationship_changes': relationship_fields,
+            'operations': operations,
+            'bulk_writes': -(-operations // chunk_size),
+            'estimated_bytes': estimated_bytes,
+        }
+
+    def changes(self):
+        """
+        Lists every planned write per member.
+
+        Returns:
+            Dicts with action ("insert" or "update"), id, name, dob and a
+            field -> {"from": stored, "to": planned} dict of changes.
+        """
+        changes = []
+        for member_id, doc in self.new_docs.items():
+            changes.append({
+                'action': 'insert',
+                'id': str(member_id),
+                'name': doc['name'],
+                'dob': _plain(doc.get('dob')),
+                'changes': {
+                    field: {'from': None, 'to': self._value(field, doc.get(field))}
+                    for field in ('phone', 'occupation', 'address', 'image', 'spouse', 'children')
+                    if doc.get(field)
+                },
+            })
+        for member_id, update_data in self.updates.items():
+            stored = self.members[member_id]
+            changes.append({
+                'action': 'update',
+                'id': str(member_id),
+                'name': stored.get('name'),
+                'dob': _plain(stored.get('dob')),
+                'changes': {
+                    field: {'from': self._value(field, stored.get(field)), 'to': self._value(field, value)}
+                    for field, value in update_data.items()
+                },
+            })
+        return changes
+
+    def write(self, path, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Writes the summary and the change list as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'summary': self.summary(chunk_size), 'changes': self.changes()}, f, indent=2, default=str)
+
+    def apply(self, collection, chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+        """
+        Writes exactly the planned changes with unordered bulk_write calls.
+
+        The plan is only valid against the snapshot it was computed from, so
+        apply it before anything else writes to the collection.
+
+        Returns:
+            The inserted and modified counts.
+        """
+        ensure_identity_index(collection)
+        backfill_identity(collection)
+        return flush(collection, self.operations(), chunk_size, stats)
+
+def build_plan(collection, row_chunks, stats=None):
+    """
+    Computes the full import plan of a sheet without writing to MongoDB.
+
+    The collection is read once. Every row is planned against that snapshot
+    the way import_bulk would write it, then compared with the stored
+    documents, so only fields that actually change are kept. Relationships
+    of new members are folded into their inserted documents and those of
+    existing members into their field updates, giving one write per member.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        row_chunks: Lists of (row index, addresses, members), e.g. from
+            reader.iter_row_chunks.
+        stats: The ImportStats charged with the "dedupe" and "plan" stages.
+
+    Returns:
+        The ImportPlan.
+    """
+    if stats is None:
+        stats = ImportStats()
+    with stats.stage('dedupe'):
+        members, identities = load_members(collection)
+    stats.count('find')
+
+    new_docs = {}
+    planned = {}
+    inserted = []
+    links = Links()
+    for rows in row_chunks:
+        with stats.stage('plan'):
+            chunk_new, chunk_updates, chunk_inserted = plan_bulk(rows, identities, links)
+            new_docs.update(chunk_new)
+            inserted.extend(chunk_inserted)
+            for member_id, fields in chunk_updates.items():
+                # Members inserted by an earlier chunk are updated in place
+                target = new_docs[member_id] if member_id in new_docs else planned.setdefault(member_id, {})
+                target.update(fields)
+
+    with stats.stage('plan'):
+        updates = {}
+        for member_id, fields in planned.items():
+            stored = members[member_id]
+            changed = {field: value for field, value in fields.items() if stored.get(field) != value}
+            if changed:
+                updates[member_id] = changed
+
+        for member_id, doc in new_docs.items():
+            member_links = links.get(member_id, {'children': []})
+            doc['children'] = member_links['children']
+            if 'spouse' in member_links:
+                doc['spouse'] = member_links['spouse']
+        existing_links = {member_id: planned_links for member_id, planned_links in links.items()
+                          if member_id not in new_docs}
+        for member_id, update_data in link_changes(existing_links, members).items():
+            updates.setdefault(member_id, {}).update(update_data)
+
+    unchanged = len(existing_links) - len(updates)
+    return ImportPlan(members, new_docs, updates, inserted, unchanged)
@@ -0,0 +1,115 @@
+import os
+import pandas as pd
+from .instrumentation import ImportStats
+from .sheet import SHEET_NAME, iter_rows
+
+DEFAULT_ROWS_PER_CHUNK = 5000
+
+# pandas' default na_values, so streamed xlsx cells match what read_excel returned
+NA_STRINGS = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a',
+    'nan', 'null'
+]
+
+def _header(cells):
+    """Names the header cells the way read_excel does (Unnamed: k, X.1 for repeats)."""
+    columns = []
+    seen = {}
+    for position, cell in enumerate(cells):
+        name = f'Unnamed: {position}' if cell is None else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+def _frame(batch, columns):
+    """Builds a chunk DataFrame, blanking the strings read_excel treats as NaN."""
+    df = pd.DataFrame(batch, columns=columns)
+    return df.mask(df.isin(NA_STRINGS))
+
+def _iter_xlsx(file_path, sheet_name, rows_per_chunk):
+    """Streams an .xlsx sheet through openpyxl's read-only mode."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        columns = _header(next(rows, ()))
+        width = len(columns)
+        batch = []
+        for values in rows:
+            batch.append((tuple(values) + (None,) * width)[:width])
+            if len(batch) == rows_per_chunk:
+                yield _frame(batch, columns)
+                batch = []
+        if batch:
+            yield _frame(batch, columns)
+    finally:
+        workbook.close()
+
+def _iter_frames(file_path, sheet_name, rows_per_chunk):
+    """Yields raw DataFrame chunks of at most rows_per_chunk rows."""
+    extension = os.path.splitext(str(file_path))[1].lower()
+    if extension == '.csv':
+        # Cells stay text as in the xlsx path, so phones keep their leading zero
+        yield from pd.read_csv(file_path, chunksize=rows_per_chunk, dtype=str)
+    elif extension in ('.xlsx', '.xlsm'):
+        yield from _iter_xlsx(file_path, sheet_name, rows_per_chunk)
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=rows_per_chunk):
+            yield batch.to_pandas()
+    else:
+        # Legacy formats have no streaming reader, slice the loaded sheet instead
+        df = pd.read_excel(file_path, sheet_name=sheet_name)
+        for start in range(0, len(df), rows_per_chunk):
+            yield df.iloc[start:start + rows_per_chunk]
+
+def read_chunks(file_path, sheet_name=SHEET_NAME, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK):
+    """
+    Streams the family sheet in bounded chunks.
+
+    Each chunk gets the same cleanup load_sheet applies to the whole file,
+    except that empty columns are kept so chunks share one layout. Row
+    indexes run on across chunks, as if the sheet had been loaded at once.
+
+    Args:
+        file_path: The path to a .xlsx, .xls, .csv or .parquet family sheet.
+        sheet_name: The sheet holding the family rows (ignored for CSV).
+        rows_per_chunk: The maximum number of rows held in memory at a time.
+
+    Yields:
+        DataFrames of at most rows_per_chunk family rows.
+    """
+    next_index = 0
+    for df in _iter_frames(file_path, sheet_name, rows_per_chunk):
+        df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+        df = df.dropna(how='all')
+        if df.empty:
+            continue
+        df.index = pd.RangeIndex(next_index, next_index + len(df))
+        next_index += len(df)
+
+        for col in df.columns:
+            if 'phone' in col.lower():
+                df[col] = df[col].astype(str).str.replace(r'\..*', '', regex=True)
+        yield df
+
+def iter_row_chunks(file_path, sheet_name=SHEET_NAME, rows_per_chunk=DEFAULT_ROWS_PER_CHUNK, stats=None):
+    """
+    Yields lists of (row index, addresses, members), one list per streamed chunk.
+
+    Time spent reading chunks is charged to the "read" stage of stats and
+    time spent turning them into members to "normalize".
+    """
+    if stats is None:
+        stats = ImportStats()
+    for df in stats.timed_iter('read', read_chunks(file_path, sheet_name, rows_per_chunk)):
+        with stats.stage('normalize'):
+            rows = list(iter_rows(df))
+        yield rows
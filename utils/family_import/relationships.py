@@ -0,0 +1,72 @@
+from pymongo import UpdateOne
+from .instrumentation import ImportStats
+
+LOOKUP_BATCH_SIZE = 1000
+
+def load_links(collection, member_ids, batch_size=LOOKUP_BATCH_SIZE, stats=None):
+    """Reads the stored spouse and children of the given members with batched $in queries."""
+    current = {}
+    member_ids = list(member_ids)
+    for start in range(0, len(member_ids), batch_size):
+        batch = member_ids[start:start + batch_size]
+        if stats is not None:
+            stats.count('find')
+        for doc in collection.find({'_id': {'$in': batch}}, {'spouse': 1, 'children': 1}):
+            current[doc['_id']] = doc
+    return current
+
+def link_changes(links, current):
+    """
+    Finds the members whose relationships differ from the stored ones.
+
+    Children are compared as sets, so a reordered list is not rewritten.
+    Members without a spouse in the sheet keep their stored spouse.
+
+    Returns:
+        A dict of _id -> the spouse/children fields to $set.
+    """
+    changes = {}
+    for member_id, planned in links.items():
+        stored = current.get(member_id, {})
+        update_data = {}
+        if set(planned['children']) != set(stored.get('children') or []):
+            update_data['children'] = planned['children']
+        if 'spouse' in planned and planned['spouse'] != stored.get('spouse'):
+            update_data['spouse'] = planned['spouse']
+        if update_data:
+            changes[member_id] = update_data
+    return changes
+
+def link_operations(links, current):
+    """Builds an UpdateOne for every member whose relationships differ from the stored ones."""
+    return [
+        UpdateOne({'_id': member_id}, {'$set': update_data})
+        for member_id, update_data in link_changes(links, current).items()
+    ]
+
+def resolve_relationships(collection, links, new_ids=(), chunk_size=1000, stats=None):
+    """
+    Writes the final spouse/children of every member in one pass.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        links: The store.Links of the import, or a dict of _id -> planned
+            {"children": [...], "spouse": _id}.
+        new_ids: Members inserted by this run, known to have no relationships
+            stored yet, so they are not read back.
+        chunk_size: The maximum number of operations per bulk_write call.
+        stats: The ImportStats charged with the "link" stage.
+
+    Returns:
+        The number of members whose relationships were written.
+    """
+    if stats is None:
+        stats = ImportStats()
+    with stats.stage('link'):
+        new_ids = set(new_ids)
+        current = load_links(collection, (member_id for member_id in links if member_id not in new_ids), stats=stats)
+        operations = link_operations(links, current)
+        for start in range(0, len(operations), chunk_size):
+            collection.bulk_write(operations[start:start + chunk_size], ordered=False)
+            stats.count('bulk_write')
+    return len(operations)
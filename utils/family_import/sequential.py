@@ -0,0 +1,67 @@
+from .identity import load_identities
+from .instrumentation import ImportStats
+from .relationships import resolve_relationships
+from .store import Links
+
+def import_sequential(collection, rows, identities=None, stats=None, verbose=False):
+    """
+    Imports the sheet one member at a time, writing as it goes.
+
+    Spouse and children links are collected across the whole sheet and
+    written once at the end by resolve_relationships.
+
+    Args:
+        collection: The pymongo collection holding the members.
+        rows: (row index, addresses, members) tuples from sheet.iter_rows.
+        identities: The identity_key -> _id dict from load_identities. It is
+            loaded here when not given and kept up to date with new members.
+        stats: The ImportStats collecting stage timings and operation counts.
+        verbose: Print every row and member as it is processed.
+
+    Returns:
+        The names of the inserted members.
+    """
+    if stats is None:
+        stats = ImportStats()
+    if identities is None:
+        with stats.stage('dedupe'):
+            identities = load_identities(collection)
+    inserted = []
+    new_ids = []
+    links = Links()
+
+    for index, addresses, members in rows:
+        member_ids = []
+        if verbose:
+            print(f"Row {index} addresses: {addresses}")
+
+        for member_data in members:
+            if verbose:
+                print(f"Processing member: {member_data}")
+
+            # Check if the member already exists in the database
+            member_id = identities.get(member_data.key)
+
+            if member_id:
+                # Update member data, relationships are resolved after the last row
+                with stats.stage('write'):
+                    collection.update_one(
+                        {"_id": member_id},
+                        {"$set": member_data.update_fields()}
+                    )
+                stats.count('update_one')
+            else:
+                with stats.stage('write'):
+                    result = collection.insert_one(member_data.document())
+                stats.count('insert_one')
+                member_id = result.inserted_id
+                identities[member_data.key] = member_id
+                new_ids.append(member_id)
+                inserted.append(member_data.name)
+
+            member_ids.append(member_id)
+
+        links.add_row(member_ids)
+
+    resolve_relationships(collection, links, new_ids, stats=stats)
+    return inserted
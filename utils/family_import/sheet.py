@@ -0,0 +1,120 @@
+import pandas as pd
+from .address import member_address, parse_addresses
+from .images import public_id_from_image
+from .store import Member
+
+SHEET_NAME = "Sheet1" # Excel Sheet name
+SENTINELS = ['NAN', 'NIL', 'NONE', "NaT",'?', '']
+
+def clean_phone_number(phone):
+    """Clean phone number by removing invalid values and returning empty string."""
+    if pd.isna(phone) or str(phone).upper() in SENTINELS or phone is None:
+        return ""
+    return str(phone).strip()
+
+def clean_field(value):
+    """Clean field by returning None if the value is NaN or empty."""
+    if pd.isna(value) or str(value).upper() in SENTINELS:
+        return None
+    return value
+
+def load_sheet(file_path, sheet_name=SHEET_NAME):
+    """
+    Loads the family sheet and drops the empty rows and columns.
+
+    Args:
+        file_path: The local path to the Excel workbook.
+        sheet_name: The sheet holding the family rows.
+
+    Returns:
+        A DataFrame with one family per row and phone columns as strings.
+    """
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    df = df.loc[:, ~df.columns.str.contains('^Unnamed')]
+    df = df.dropna(how='all')
+    df = df.dropna(axis=1, how='all')
+    df = df.reset_index(drop=True)
+
+    for col in df.columns:
+        if 'phone' in col.lower():
+            df[col] = df[col].astype(str).str.replace(r'\..*', '', regex=True)
+    return df
+
+MEMBER_STUBS = ['Name', 'Date of Birth', 'Occupation', 'Phone']
+
+def _is_missing(series):
+    """Vectorized clean_field check: True where the cell is NaN or a sentinel like NIL or '?'."""
+    return series.isna() | series.astype(str).str.upper().isin(SENTINELS)
+
+def _with_default(series, missing, default):
+    """Returns the series values as an object array with `default` where `missing` is set."""
+    values = series.to_numpy(dtype=object, copy=True)
+    values[missing.to_numpy()] = default
+    return values
+
+def normalize_members(df):
+    """
+    Reshapes the wide Name1..NameN layout into one row per member.
+
+    Cleaning, phone handling and date parsing are applied to whole columns,
+    and members after the first empty Name{i} of a row are dropped, so the
+    table holds exactly the members the sheet importer has always built.
+
+    Args:
+        df: The family sheet as returned by load_sheet.
+
+    Returns:
+        A DataFrame with row, member, name, dob, phone, occupation and image
+        columns, ordered by row and member index. Images are the Cloudinary
+        public_id the cell refers to, as the uploader's link step stores them.
+    """
+    member_numbers = sorted(
+        int(col[len('Name'):]) for col in df.columns
+        if col.startswith('Name') and col[len('Name'):].isdigit()
+    )
+    columns = ['row', 'member', 'name', 'dob', 'phone', 'occupation', 'image']
+    if not member_numbers:
+        return pd.DataFrame(columns=columns)
+
+    # Every member number needs all four stub columns for wide_to_long
+    wide_columns = [f'{stub}{i}' for i in range(1, member_numbers[-1] + 1) for stub in MEMBER_STUBS]
+    wide = df.reindex(columns=wide_columns).astype(object)
+    wide['row'] = df.index
+    long = pd.wide_to_long(wide, stubnames=MEMBER_STUBS, i='row', j='member')
+    long = long.reset_index().sort_values(['row', 'member'], kind='stable')
+
+    # A row's members end at its first empty Name{i}
+    present = long['Name'].notna()
+    long = long[present.groupby(long['row']).cummin()]
+
+    dob = long['Date of Birth']
+    dob_missing = _is_missing(dob)
+    parsed = pd.to_datetime(dob.where(~dob_missing), dayfirst=True, errors='coerce', format='mixed')
+    phone = long['Phone']
+    image = df['Images'] if 'Images' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    image = image.where(~_is_missing(image)).map(public_id_from_image, na_action='ignore').reindex(long['row'])
+
+    return pd.DataFrame({
+        'row': long['row'].to_numpy(),
+        'member': long['member'].to_numpy(),
+        'name': long['Name'].astype(str).str.strip().to_numpy(),
+        'dob': _with_default(parsed, dob_missing, None),
+        'phone': _with_default(phone.astype(str).str.strip(), _is_missing(phone), ""),
+        'occupation': _with_default(long['Occupation'], _is_missing(long['Occupation']), None),
+        'image': _with_default(image, _is_missing(image), None),
+    }, columns=columns, dtype=object)
+
+def iter_rows(df):
+    """Yields (row index, addresses, members) for every family row of the sheet, members as store.Member."""
+    members_by_row = {}
+    for member in normalize_members(df).itertuples(index=False):
+        members_by_row.setdefault(member.row, []).append(member)
+
+    address = df['Address']
+    for index, addresses in zip(df.index, parse_addresses(address.where(~_is_missing(address)))):
+        members = [
+            Member(member.name, member.dob, member.phone, member.occupation,
+                   member_address(addresses, member.member), member.image)
+            for member in members_by_row.get(index, [])
+        ]
+        yield index, addresses, members
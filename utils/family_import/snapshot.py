@@ -0,0 +1,79 @@
+import json
+import os
+from datetime import datetime, timezone
+from .graph import family_graph, generations
+
+try:
+    import msgpack
+except ImportError:  # msgpack is only needed for .msgpack snapshots
+    msgpack = None
+
+SNAPSHOT_FIELDS = {'name': 1, 'dob': 1, 'image': 1, 'spouse': 1, 'children': 1}
+
+def _date(value):
+    """Formats a dob as YYYY-MM-DD."""
+    return value.strftime('%Y-%m-%d') if value else None
+
+def build_snapshot(members):
+    """
+    Precomputes the family graph from member documents.
+
+    Args:
+        members: Documents with _id, name, dob, image, spouse and children.
+
+    Returns:
+        A dict with "members" (id -> name, dob, image, spouse, children,
+        parents and generation), "roots" (the ids of the top ancestors) and
+        "generations" (the number of generations), with ids as strings.
+    """
+    members = {doc['_id']: doc for doc in members}
+    spouses, children, parents = family_graph(members)
+    generation = generations(members, parents, children, spouses)
+    roots = [
+        member_id for member_id in members
+        if not parents[member_id] and not parents.get(spouses[member_id])
+    ]
+
+    def key(member_id):
+        return str(member_id) if member_id is not None else None
+
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'members': {
+            key(member_id): {
+                'name': doc.get('name'),
+                'dob': _date(doc.get('dob')),
+                'image': doc.get('image'),
+                'spouse': key(spouses[member_id]),
+                'children': [key(child_id) for child_id in children[member_id]],
+                'parents': [key(parent_id) for parent_id in parents[member_id]],
+                'generation': generation.get(member_id),
+            }
+            for member_id, doc in members.items()
+        },
+        'roots': [key(member_id) for member_id in roots],
+        'generations': max(generation.values(), default=-1) + 1,
+    }
+
+def load_snapshot_members(collection):
+    """Reads every member with only the fields the snapshot needs."""
+    return collection.find({}, SNAPSHOT_FIELDS)
+
+def write_snapshot(snapshot, path):
+    """Writes the snapshot as compact JSON, or msgpack when the path ends in .msgpack."""
+    temp_path = f"{path}.tmp"
+    if str(path).endswith('.msgpack'):
+        if msgpack is None:
+            raise RuntimeError("msgpack snapshots require msgpack: pip install msgpack")
+        with open(temp_path, 'wb') as f:
+            f.write(msgpack.packb(snapshot))
+    else:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+    os.replace(temp_path, path)
+
+def export_snapshot(collection, path):
+    """Builds the graph snapshot from the collection in one read and writes it to path."""
+    snapshot = build_snapshot(load_snapshot_members(collection))
+    write_snapshot(snapshot, path)
+    return snapshot
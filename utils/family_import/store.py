@@ -0,0 +1,136 @@
+import sys
+from array import array
+from .identity import IDENTITY_FIELD, identity_key
+
+MEMBER_FIELDS = ('name', 'dob', 'phone', 'occupation', 'address', 'image')
+# Links.spouses value of members the sheet never pairs with anyone
+NO_SPOUSE = -1
+
+def _intern(value):
+    """Shares repeated strings (occupations, row addresses and images) between members."""
+    return sys.intern(value) if type(value) is str else value
+
+class Member:
+    """
+    One member read from a family row.
+
+    Members only hold the cleaned sheet values and their identity key, in
+    slots rather than a dict per member, with their strings interned. The
+    MongoDB documents are built by document() and update_fields() when the
+    member is written.
+    """
+
+    __slots__ = MEMBER_FIELDS + ('key',)
+
+    def __init__(self, name, dob, phone, occupation, address, image):
+        self.name = _intern(name)
+        # A plain datetime is a third of a pandas Timestamp and encodes the same
+        self.dob = dob.to_pydatetime() if hasattr(dob, 'to_pydatetime') and dob == dob else dob
+        self.phone = _intern(phone)
+        self.occupation = _intern(occupation)
+        self.address = _intern(address)
+        self.image = _intern(image)
+        name_key, dob_key = identity_key(self.name, self.dob)
+        self.key = (_intern(name_key), dob_key)
+
+    def __repr__(self):
+        values = ', '.join(f"{field}={getattr(self, field)!r}" for field in MEMBER_FIELDS)
+        return f"Member({values})"
+
+    def document(self, member_id=None):
+        """The document inserted for a new member, without relationships yet."""
+        doc = {'_id': member_id} if member_id is not None else {}
+        for field in MEMBER_FIELDS:
+            doc[field] = getattr(self, field)
+        doc['spouse'] = None
+        doc['children'] = []
+        doc[IDENTITY_FIELD] = self.key[0]
+        return doc
+
+    def update_fields(self):
+        """The fields $set on an existing member; a blank address or image keeps the stored one."""
+        update_data = {'phone': self.phone, 'occupation': self.occupation}
+        if self.address:
+            update_data['address'] = self.address
+        if self.image:
+            update_data['image'] = self.image
+        return update_data
+
+class Links:
+    """
+    The spouse and children planned for every member of an import.
+
+    Each member gets a small integer id the first time a row lists them.
+    Spouses are kept in one array and each parent's children in an array
+    of those integers, so planning a large sheet costs a few machine words
+    per member instead of a dict and a list each. The _ids come back when
+    the planned relationships are read for writing.
+
+    Links reads like the dict of _id -> {"children": [...], "spouse": _id}
+    it replaces: items(), get(), iteration and membership give _ids and
+    planned dicts, with "spouse" only for members the sheet pairs.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.positions = {}
+        self.spouses = array('q')
+        self.children = []
+
+    def position(self, member_id):
+        """The integer id of a member, assigned on first use."""
+        position = self.positions.get(member_id)
+        if position is None:
+            position = self.positions[member_id] = len(self.ids)
+            self.ids.append(member_id)
+            self.spouses.append(NO_SPOUSE)
+            self.children.append(None)
+        return position
+
+    def add_row(self, member_ids):
+        """
+        Records the spouse and parent -> child edges implied by one family row.
+
+        The first two members of a row are a couple and the rest are their
+        children. Every member of the row gets an entry, so members who are
+        never a parent resolve to an empty children list. When a member is
+        listed with different spouses, the last row wins.
+        """
+        positions = [self.position(member_id) for member_id in member_ids]
+        if len(positions) < 2:
+            return
+        first, second = positions[:2]
+        self.spouses[first] = second
+        self.spouses[second] = first
+        for child in positions[2:]:
+            for parent in (first, second):
+                children = self.children[parent]
+                if children is None:
+                    children = self.children[parent] = array('q')
+                if child not in children:
+                    children.append(child)
+
+    def planned(self, position):
+        """The {"children": [...], "spouse": _id} dict of the member at position."""
+        children = self.children[position]
+        planned = {'children': [self.ids[child] for child in children] if children is not None else []}
+        if self.spouses[position] != NO_SPOUSE:
+            planned['spouse'] = self.ids[self.spouses[position]]
+        return planned
+
+    def items(self):
+        for position, member_id in enumerate(self.ids):
+            yield member_id, self.planned(position)
+
+    def get(self, member_id, default=None):
+        position = self.positions.get(member_id)
+        return self.planned(position) if position is not None else default
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __contains__(self, member_id):
+        return member_id in self.positions
+
+    def __len__(self):
+        return len(self.ids)
@@ -0,0 +1,6 @@
+import os
+from family_import.cli import duplicates_main
+
+if __name__ == "__main__":
+    # Load environment variables from parent directory, database from DB_NAME
+    duplicates_main(env_path=os.path.join(os.path.dirname(__file__), "../.env"))
@@ -1,58 +1,462 @@
 import os
-from pymongo import MongoClient
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient, monitoring
 from rich.console import Console
+from rich.table import Table
 from dotenv import load_dotenv
+from family_import import CommandTimer, ImportStats, recording
 
 console = Console()
 
-# Load environment variables
-load_dotenv(".env")
-dburi = os.getenv("MONGODB_URI")
-
-# Check if MongoDB URI exists
-if not dburi:
-    console.print("[bold red]Error: MONGODB_URI environment variable not found or empty[/bold red]")
-    exit(1)
-
-console.print(f"[bold blue]Attempting to connect to MongoDB with URI: {dburi}[/bold blue]")
-
-try:
-    # Connect to MongoDB
-    client = MongoClient(dburi, serverSelectionTimeoutMS=5000)
-    
-    # Test the connection
-    client.admin.command('ping')
-    
-    console.print("[bold green]Successfully connected to MongoDB![/bold green]")
-    
-    # Print database information
-    db_names = client.list_database_names()
-    console.print(f"[bold cyan]Available databases: {db_names}[/bold cyan]")
-    
-    # Check if the specific database and collection exist
-    db_name = "basajja"
-    collection_name = "budimbe"
-    
-    if db_name in db_names:
-        db = client[db_name]
-        collection_names = db.list_collection_names()
-        console.print(f"[bold cyan]Collections in {db_name}: {collection_names}[/bold cyan]")
-        
-        if collection_name in collection_names:
-            console.print(f"[bold green]Collection '{collection_name}' exists![/bold green]")
-            # Count documents in the collection
-            count = db[collection_name].count_documents({})
-            console.print(f"[bold cyan]Number of documents in '{collection_name}': {count}[/bold cyan]")
-        else:
-            console.print(f"[bold yellow]Collection '{collection_name}' does not exist in database '{db_name}'[/bold yellow]")
-    else:
+DB_NAME = "basajja"
+COLLECTION_NAME = "budimbe"
+# Scratch collection the write and read tests create and drop again
+SCRATCH_COLLECTION = "diagnostics_scratch"
+SERVER_SELECTION_TIMEOUT_MS = 5000
+DEFAULT_PINGS = 50
+DEFAULT_CONNECT_TRIALS = 5
+# maxPoolSize of the load test client, small enough for the higher levels to queue
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CONCURRENCY = [1, 4, 8, 16, 32]
+DEFAULT_OPERATIONS = 200
+DEFAULT_BATCH_SIZES = [100, 1000, 10000]
+DEFAULT_SCRATCH_DOCS = 5000
+DEFAULT_SINGLE_INSERTS = 500
+DEFAULT_WRITE_CHUNK = 1000
+
+def latency_summary(seconds):
+    """Summarizes latencies in seconds as milliseconds: count, min, mean, p50, p95, p99, max and stdev."""
+    ordered = sorted(seconds)
+    if not ordered:
+        return {"count": 0}
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {
+        "count": len(ordered),
+        "min_ms": ordered[0] * 1000,
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "stdev_ms": statistics.pstdev(ordered) * 1000,
+    }
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Counts the connections a client opens and how long checkouts wait for one.
+
+    Checkout events fire on the thread asking for the connection, so the
+    start of each wait is kept per thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.failed_checkouts = 0
+            self.checkout_waits = []
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            with self._lock:
+                self.checkout_waits.append(time.perf_counter() - started)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.failed_checkouts += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.closed += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+def check_connection(client, db_name=DB_NAME, collection_name=COLLECTION_NAME):
+    """
+    Lists the databases and collections and estimates the member count.
+
+    estimated_document_count reads the collection metadata instead of
+    scanning every document the way count_documents({}) does.
+
+    Returns:
+        A dict with the databases, the collections of db_name (None when
+        it does not exist) and the estimated member count (None when the
+        collection does not exist).
+    """
+    info = {"databases": client.list_database_names(), "collections": None, "estimated_count": None}
+    console.print(f"[bold cyan]Available databases: {info['databases']}[/bold cyan]")
+
+    if db_name not in info["databases"]:
         console.print(f"[bold yellow]Database '{db_name}' does not exist[/bold yellow]")
-        
-except Exception as e:
-    console.print(f"[bold red]Error connecting to MongoDB: {e}[/bold red]")
-    exit(1)
-finally:
-    # Close the connection
-    if 'client' in locals():
+        return info
+    db = client[db_name]
+    info["collections"] = db.list_collection_names()
+    console.print(f"[bold cyan]Collections in {db_name}: {info['collections']}[/bold cyan]")
+
+    if collection_name not in info["collections"]:
+        console.print(f"[bold yellow]Collection '{collection_name}' does not exist in database '{db_name}'[/bold yellow]")
+        return info
+    console.print(f"[bold green]Collection '{collection_name}' exists![/bold green]")
+    info["estimated_count"] = db[collection_name].estimated_document_count()
+    console.print(f"[bold cyan]Estimated number of documents in '{collection_name}': {info['estimated_count']}[/bold cyan]")
+    return info
+
+def measure_connection_setup(uri, trials=DEFAULT_CONNECT_TRIALS, client_factory=MongoClient):
+    """
+    Times opening a fresh client, cold first ping against warm second ping.
+
+    The first ping on a new client pays for DNS (including SRV lookups),
+    TCP, TLS, the handshake and authentication; the second one only for
+    the round trip, so their difference is the connection setup cost.
+    """
+    cold, warm = [], []
+    for _ in range(trials):
+        started = time.perf_counter()
+        client = client_factory(uri, maxPoolSize=1, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS)
+        try:
+            client.admin.command("ping")
+            cold.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            client.admin.command("ping")
+            warm.append(time.perf_counter() - started)
+        finally:
+            client.close()
+    return {
+        "cold_ping": latency_summary(cold),
+        "warm_ping": latency_summary(warm),
+        "setup": latency_summary([max(0.0, c - w) for c, w in zip(cold, warm)]),
+    }
+
+def measure_ping(client, pings=DEFAULT_PINGS):
+    """Times pings on one warm connection, the network round trip without server work."""
+    client.admin.command("ping")
+    latencies = []
+    for _ in range(pings):
+        started = time.perf_counter()
+        client.admin.command("ping")
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+def measure_pool(uri, levels=DEFAULT_CONCURRENCY, operations=DEFAULT_OPERATIONS, pool_size=DEFAULT_POOL_SIZE,
+                 client_factory=MongoClient):
+    """
+    Runs the same number of pings at each concurrency level through one pool.
+
+    Once the threads outnumber maxPoolSize they queue for a connection, which
+    shows as checkout waits and a flat throughput.
+
+    Returns:
+        One dict per level with the throughput, ping latencies, checkout
+        waits and the connections the pool opened during the level.
+    """
+    monitor = PoolMonitor()
+    client = client_factory(uri, maxPoolSize=pool_size, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+                            event_listeners=[monitor])
+    results = []
+    try:
+        client.admin.command("ping")
+
+        def timed_ping(_):
+            started = time.perf_counter()
+            client.admin.command("ping")
+            return time.perf_counter() - started
+
+        for level in levels:
+            monitor.reset()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=level) as executor:
+                latencies = list(executor.map(timed_ping, range(operations)))
+            elapsed = max(time.perf_counter() - started, 1e-9)
+            results.append({
+                "concurrency": level,
+                "ops_per_sec": operations / elapsed,
+                "latency": latency_summary(latencies),
+                "checkout_wait": latency_summary(monitor.checkout_waits),
+                "connections_created": monitor.created,
+                "failed_checkouts": monitor.failed_checkouts,
+            })
+    finally:
         client.close()
-        console.print("[bold blue]MongoDB connection closed[/bold blue]")
\ No newline at end of file
+    return results
+
+def scratch_documents(count, seed=0):
+    """Member-shaped documents for the scratch collection."""
+    rng = random.Random(seed)
+    first_dob = datetime(1920, 1, 1)
+    return [
+        {
+            "name": f"Member {position}",
+            "name_key": f"member {position}",
+            "dob": first_dob + timedelta(days=rng.randrange(365 * 100)),
+            "phone": str(rng.randrange(700000000, 799999999)),
+            "occupation": rng.choice(["Teacher", "Farmer", "Engineer", "Nurse", "Business"]),
+            "address": f"{rng.randrange(1, 500)} Street, Kampala",
+            "image": None,
+            "children": [],
+        }
+        for position in range(count)
+    ]
+
+def measure_writes(scratch, documents=DEFAULT_SCRATCH_DOCS, single_inserts=DEFAULT_SINGLE_INSERTS,
+                   chunk_size=DEFAULT_WRITE_CHUNK):
+    """
+    Compares one insert_one per document with unordered insert_many batches.
+
+    The scratch collection is emptied first and left holding the bulk
+    inserted documents for the read tests.
+    """
+    scratch.drop()
+    single_count = min(single_inserts, documents)
+    docs = scratch_documents(single_count)
+    started = time.perf_counter()
+    for doc in docs:
+        scratch.insert_one(doc)
+    single_elapsed = max(time.perf_counter() - started, 1e-9)
+
+    scratch.drop()
+    docs = scratch_documents(documents)
+    started = time.perf_counter()
+    for start in range(0, len(docs), chunk_size):
+        scratch.insert_many(docs[start:start + chunk_size], ordered=False)
+    bulk_elapsed = max(time.perf_counter() - started, 1e-9)
+
+    single_rate = single_count / single_elapsed
+    bulk_rate = documents / bulk_elapsed
+    return {
+        "single": {"documents": single_count, "seconds": single_elapsed, "docs_per_sec": single_rate},
+        "bulk": {"documents": documents, "chunk_size": chunk_size, "seconds": bulk_elapsed, "docs_per_sec": bulk_rate},
+        "speedup": bulk_rate / single_rate if single_rate else None,
+    }
+
+def measure_reads(collection, batch_sizes=DEFAULT_BATCH_SIZES, limit=0):
+    """
+    Reads the collection once per cursor batch size.
+
+    Documents are read as RawBSONDocument, so the timings measure the
+    server and the network rather than decoding, and their size is known.
+    The find/getMore round trips come from the client's CommandTimer.
+    """
+    raw = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+    results = []
+    for batch_size in batch_sizes:
+        stats = ImportStats()
+        documents = size = 0
+        started = time.perf_counter()
+        with recording(stats):
+            for doc in raw.find({}, batch_size=batch_size, limit=limit):
+                documents += 1
+                size += len(doc.raw)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        commands = stats.report()["commands"]
+        results.append({
+            "batch_size": batch_size,
+            "documents": documents,
+            "seconds": elapsed,
+            "docs_per_sec": documents / elapsed,
+            "mb_per_sec": size / (1024 * 1024) / elapsed,
+            "round_trips": sum(commands.get(name, {}).get("count", 0) for name in ("find", "getMore")),
+        })
+    return results
+
+def print_results(results):
+    """Prints one table per measurement."""
+    def latency_row(label, summary):
+        if not summary.get("count"):
+            return [label] + ["n/a"] * 6
+        return [label, str(summary["count"])] + [
+            f"{summary[key]:.1f}" for key in ("min_ms", "p50_ms", "p95_ms", "max_ms", "stdev_ms")
+        ]
+
+    latencies = Table(title="Latency (ms)")
+    for column in ("measurement", "count", "min", "p50", "p95", "max", "stdev"):
+        latencies.add_column(column, justify="right")
+    latencies.add_row(*latency_row("ping", results["ping"]))
+    setup = results["connection_setup"]
+    latencies.add_row(*latency_row("new client, first ping", setup["cold_ping"]))
+    latencies.add_row(*latency_row("connection setup", setup["setup"]))
+    console.print(latencies)
+
+    pool = Table(title=f"Pool under load (maxPoolSize={results['pool_size']})")
+    for column in ("threads", "pings/s", "p50 ms", "p95 ms", "checkout wait p95 ms", "connections opened"):
+        pool.add_column(column, justify="right")
+    for level in results["pool"]:
+        wait = level["checkout_wait"]
+        pool.add_row(
+            str(level["concurrency"]), f"{level['ops_per_sec']:.0f}",
+            f"{level['latency']['p50_ms']:.1f}", f"{level['latency']['p95_ms']:.1f}",
+            f"{wait['p95_ms']:.1f}" if wait.get("count") else "n/a", str(level["connections_created"]),
+        )
+    console.print(pool)
+
+    writes = results["writes"]
+    if writes is not None:
+        table = Table(title="Writes")
+        for column in ("method", "documents", "seconds", "docs/s"):
+            table.add_column(column, justify="right")
+        table.add_row("insert_one", str(writes["single"]["documents"]), f"{writes['single']['seconds']:.2f}",
+                      f"{writes['single']['docs_per_sec']:.0f}")
+        table.add_row(f"insert_many x{writes['bulk']['chunk_size']}", str(writes["bulk"]["documents"]),
+                      f"{writes['bulk']['seconds']:.2f}", f"{writes['bulk']['docs_per_sec']:.0f}")
+        console.print(table)
+        if writes["speedup"]:
+            console.print(f"[blue]Bulk inserts are {writes['speedup']:.1f}x faster than single inserts[/blue]")
+
+    reads = Table(title=f"Reads ({results['read_collection']})")
+    for column in ("batch size", "documents", "seconds", "docs/s", "MB/s", "round trips"):
+        reads.add_column(column, justify="right")
+    for read in results["reads"]:
+        reads.add_row(str(read["batch_size"]), str(read["documents"]), f"{read['seconds']:.2f}",
+                      f"{read['docs_per_sec']:.0f}", f"{read['mb_per_sec']:.2f}", str(read["round_trips"]))
+    console.print(reads)
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Check the MongoDB connection and measure latency, pool behaviour and throughput.")
+    parser.add_argument("--quick", action="store_true",
+                        help="only ping, list the databases and estimate the member count")
+    parser.add_argument("--pings", type=int, default=DEFAULT_PINGS, help="pings timed on a warm connection")
+    parser.add_argument("--connect-trials", type=int, default=DEFAULT_CONNECT_TRIALS,
+                        help="fresh clients opened to time connection setup")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="maxPoolSize of the client used for the load test")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help="thread counts of the load test")
+    parser.add_argument("--operations", type=int, default=DEFAULT_OPERATIONS,
+                        help="pings sent at each concurrency level")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES,
+                        help="cursor batch sizes of the read test")
+    parser.add_argument("--documents", type=int, default=DEFAULT_SCRATCH_DOCS,
+                        help="documents bulk inserted into the scratch collection")
+    parser.add_argument("--single-inserts", type=int, default=DEFAULT_SINGLE_INSERTS,
+                        help="documents inserted one at a time")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_WRITE_CHUNK,
+                        help="documents per insert_many call")
+    parser.add_argument("--no-writes", action="store_true",
+                        help=f"skip the write test and read the members collection instead of {SCRATCH_COLLECTION}")
+    parser.add_argument("--read-limit", type=int, default=0,
+                        help="documents read per batch size, 0 for the whole collection")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    return parser
+
+def main(argv=None, env_path=".env", client_factory=MongoClient):
+    """
+    Checks the connection to MONGODB_URI and, unless --quick, benchmarks it.
+
+    Args:
+        argv: The arguments, sys.argv by default.
+        env_path: The .env file holding MONGODB_URI.
+        client_factory: Creates the clients, MongoClient by default.
+
+    Returns:
+        The process exit code, 0 when the connection works.
+    """
+    args = build_parser().parse_args(argv)
+
+    # Load environment variables
+    load_dotenv(env_path)
+    dburi = os.getenv("MONGODB_URI")
+
+    # Check if MongoDB URI exists
+    if not dburi:
+        console.print("[bold red]Error: MONGODB_URI environment variable not found or empty[/bold red]")
+        return 1
+
+    console.print("[bold blue]Attempting to connect to MongoDB[/bold blue]")
+    db_name = os.getenv("DB_NAME", DB_NAME)
+
+    client = None
+    try:
+        # Connect to MongoDB
+        client = client_factory(dburi, serverSelectionTimeoutMS=SERVER_SELECTION_TIMEOUT_MS,
+                                event_listeners=[CommandTimer()])
+
+        # Test the connection
+        client.admin.command('ping')
+        console.print("[bold green]Successfully connected to MongoDB![/bold green]")
+        results = {"connection": check_connection(client, db_name)}
+        if args.quick:
+            return 0
+
+        console.print("[blue]Timing pings and connection setup...[/blue]")
+        results["ping"] = measure_ping(client, args.pings)
+        results["connection_setup"] = measure_connection_setup(dburi, args.connect_trials, client_factory)
+        console.print("[blue]Loading the connection pool...[/blue]")
+        results["pool_size"] = args.pool_size
+        results["pool"] = measure_pool(dburi, args.concurrency, args.operations, args.pool_size, client_factory)
+
+        scratch = client[db_name][SCRATCH_COLLECTION]
+        try:
+            if args.no_writes:
+                results["writes"] = None
+                read_collection = client[db_name][COLLECTION_NAME]
+            else:
+                console.print(f"[blue]Writing {args.documents} documents to {SCRATCH_COLLECTION}...[/blue]")
+                results["writes"] = measure_writes(scratch, args.documents, args.single_inserts, args.chunk_size)
+                read_collection = scratch
+            console.print(f"[blue]Reading {read_collection.name}...[/blue]")
+            results["read_collection"] = read_collection.name
+            results["reads"] = measure_reads(read_collection, args.batch_sizes, args.read_limit)
+        finally:
+            if not args.no_writes:
+                scratch.drop()
+
+        print_results(results)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2, default=str)
+            console.print(f"[blue]Wrote the results to {args.json}[/blue]")
+
+    except Exception as e:
+        console.print(f"[bold red]Error connecting to MongoDB: {e}[/bold red]")
+        return 1
+    finally:
+        # Close the connection
+        if client is not None:
+            client.close()
+            console.print("[bold blue]MongoDB connection closed[/bold blue]")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
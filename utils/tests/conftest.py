@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tests import family_import and the scripts the way they import each other, from utils/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
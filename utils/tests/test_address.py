@@ -0,0 +1,26 @@
+import pytest
+from family_import.address import SHARED_ADDRESS, member_address, split_addresses
+
+@pytest.mark.parametrize('cell, expected', [
+    ('1. Plot 5 Kampala\n2. Entebbe', {1: 'Plot 5 Kampala', 2: 'Entebbe'}),
+    ('1. Plot 5 Kampala2. Entebbe', {1: 'Plot 5 Kampala', 2: 'Entebbe'}),
+    ('1.Kampala 2.Entebbe 10.Jinja', {1: 'Kampala', 2: 'Entebbe', 10: 'Jinja'}),
+    ('1. Plot 12.5 Kampala 2. 5.5 km past Mukono', {1: 'Plot 12.5 Kampala', 2: '5.5 km past Mukono'}),
+    ('1. Plot 12.5. Kampala 2. Entebbe', {1: 'Plot 12.5. Kampala', 2: 'Entebbe'}),
+])
+def test_numbered_cells(cell, expected):
+    assert split_addresses(cell) == expected
+
+@pytest.mark.parametrize('cell, expected', [
+    ('Plot 5 Kampala', {SHARED_ADDRESS: 'Plot 5 Kampala'}),
+    ('5.5 km past Mukono\nWakiso', {SHARED_ADDRESS: '5.5 km past Mukono Wakiso'}),
+    ('  ', {}),
+    (None, {}),
+    (float('nan'), {}),
+])
+def test_unnumbered_cells(cell, expected):
+    assert split_addresses(cell) == expected
+
+def test_members_fall_back_to_the_shared_address():
+    assert member_address(split_addresses('Kampala'), 3) == 'Kampala'
+    assert member_address(split_addresses('1. Kampala'), 2) is None
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import cloudinary.exceptions
+import pytest
+from cloudinaryuploader import find_images, upload, upload_folder_images, upload_image_with_original_filename
+
+PIL = pytest.importorskip("PIL.Image")
+
+class StubUploader:
+    """Records the files handed to cloudinary.uploader.upload."""
+
+    def __init__(self):
+        self.uploaded = []
+
+    def __call__(self, path, public_id, **options):
+        self.uploaded.append(path)
+        return {"public_id": public_id}
+
+def write_image(path, size=(64, 32)):
+    PIL.new("RGB", size, "red").save(path, "JPEG")
+
+class FlakyUploader:
+    """Fails each file with its listed errors, in order, before succeeding."""
+
+    def __init__(self, errors=None, delays=None):
+        self.errors = {name: list(raised) for name, raised in (errors or {}).items()}
+        self.delays = delays or {}
+        self.attempts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, path, public_id, **options):
+        with self._lock:
+            self.attempts[public_id] = self.attempts.get(public_id, 0) + 1
+            raised = self.errors.get(public_id)
+            error = raised.pop(0) if raised else None
+        time.sleep(self.delays.get(public_id, 0))
+        if error is not None:
+            raise error
+        return {"public_id": public_id}
+
+def test_transient_errors_are_retried(tmp_path):
+    image = tmp_path / "IMG_1.jpg"
+    write_image(image)
+    stub = FlakyUploader({"IMG_1": [TimeoutError("timed out"), cloudinary.exceptions.Error("502")]})
+
+    assert upload_image_with_original_filename(str(image), "preset", backoff=0, upload_fn=stub) == "IMG_1"
+    assert stub.attempts == {"IMG_1": 3}
+
+def test_permanent_errors_are_not_retried(tmp_path):
+    image = tmp_path / "IMG_1.jpg"
+    write_image(image)
+    stub = FlakyUploader({"IMG_1": [cloudinary.exceptions.BadRequest("Invalid image file")]})
+
+    assert upload_image_with_original_filename(str(image), "preset", backoff=0, upload_fn=stub) is None
+    assert stub.attempts == {"IMG_1": 1}
+
+def test_parallel_upload_keeps_folder_order(tmp_path):
+    names = [f"IMG_{n}" for n in range(6)]
+    for name in names:
+        write_image(tmp_path / f"{name}.jpg")
+    # Earlier files finish last, so completion order is the reverse of folder order
+    stub = FlakyUploader(
+        errors={"IMG_2": [TimeoutError("timed out")], "IMG_4": [cloudinary.exceptions.NotAllowed("no")]},
+        delays={name: 0.01 * (len(names) - n) for n, name in enumerate(names)},
+    )
+
+    uploaded = upload_folder_images(str(tmp_path), "preset", workers=4, backoff=0, upload_fn=stub)
+
+    expected = [os.path.splitext(os.path.basename(path))[0] for path in find_images(str(tmp_path))]
+    assert uploaded == [name for name in expected if name != "IMG_4"]
+    assert stub.attempts["IMG_2"] == 2 and stub.attempts["IMG_4"] == 1
+
+def test_preprocess_failure_fails_only_that_image(tmp_path):
+    write_image(tmp_path / "good.jpg")
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    stub = StubUploader()
+
+    uploaded = upload_folder_images(str(tmp_path), "preset", upload_fn=stub, preprocess=True, preprocess_workers=1)
+
+    assert uploaded == ["good"]
+    assert len(stub.uploaded) == 1
+
+def test_single_file_is_preprocessed(tmp_path):
+    image = tmp_path / "IMG_1.jpg"
+    write_image(image, size=(400, 100))
+    sizes = []
+
+    def upload_fn(path, public_id, **options):
+        with PIL.open(path) as img:
+            sizes.append(img.size)
+        return {"public_id": public_id}
+
+    public_id = upload(str(image), "preset", upload_fn=upload_fn, preprocess=True, max_dimension=100)
+
+    assert public_id == "IMG_1"
+    assert sizes == [(100, 25)]
+
+def test_changed_preprocess_settings_reupload(tmp_path):
+    write_image(tmp_path / "IMG_1.jpg", size=(300, 100))
+    sizes = []
+
+    def upload_fn(path, public_id, **options):
+        with PIL.open(path) as img:
+            sizes.append(img.size)
+        return {"public_id": public_id}
+
+    upload_folder_images(str(tmp_path), "preset", upload_fn=upload_fn)
+    upload_folder_images(str(tmp_path), "preset", upload_fn=upload_fn, preprocess=True, max_dimension=150)
+    upload_folder_images(str(tmp_path), "preset", upload_fn=upload_fn, preprocess=True, max_dimension=150)
+    upload_folder_images(str(tmp_path), "preset", upload_fn=upload_fn, preprocess=True, max_dimension=60)
+
+    assert sizes == [(300, 100), (150, 50), (60, 20)]
+
+def test_preprocessing_runs_ahead_of_uploads(tmp_path):
+    for n in range(4):
+        write_image(tmp_path / f"IMG_{n}.jpg")
+    ready = []
+
+    def upload_fn(path, public_id, **options):
+        # With one upload thread, the other images can only be ready here if
+        # preprocessing does not wait for the uploads
+        deadline = time.monotonic() + 10
+        while len(os.listdir(os.path.dirname(path))) < 4 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        ready.append(len(os.listdir(os.path.dirname(path))))
+        return {"public_id": public_id}
+
+    uploaded = upload_folder_images(str(tmp_path), "preset", workers=1, upload_fn=upload_fn,
+                                    preprocess=True, preprocess_workers=2)
+
+    assert len(uploaded) == 4
+    assert ready[0] == 4
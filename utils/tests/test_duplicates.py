@@ -0,0 +1,38 @@
+import mongomock
+import pytest
+from datetime import datetime
+from family_import import find_duplicates
+from family_import.duplicates import MIN_SCORE, name_similarity, name_tokens, score_pair
+
+def pair_score(first_name, second_name, first_dob=None, second_dob=None):
+    first = {'_id': 1, 'name': first_name, 'dob': first_dob}
+    second = {'_id': 2, 'name': second_name, 'dob': second_dob}
+    spouses, children, parents = {1: None, 2: None}, {1: [], 2: []}, {1: [], 2: []}
+    name_score = name_similarity(name_tokens(first_name), name_tokens(second_name))
+    return score_pair(first, second, name_score, spouses, children, parents)[0]
+
+@pytest.mark.parametrize('first_name, second_name', [
+    ('John Kato', 'Jon Kato'),
+    ('Sarah Nakato', 'Sara Nakatto'),
+])
+def test_typos_without_dob_reach_min_score(first_name, second_name):
+    assert pair_score(first_name, second_name) >= MIN_SCORE
+
+def test_dob_orders_scores():
+    born = datetime(1960, 2, 1)
+    same = pair_score('John Kato', 'Jon Kato', born, born)
+    missing = pair_score('John Kato', 'Jon Kato', born)
+    different = pair_score('John Kato', 'Jon Kato', born, datetime(1970, 2, 1))
+    assert same > missing > MIN_SCORE > different
+
+def test_find_duplicates_reports_typos_without_dob():
+    collection = mongomock.MongoClient().famtree.members
+    collection.insert_many([
+        {'name': name, 'dob': None, 'spouse': None, 'children': []}
+        for name in ('John Kato', 'Jon Kato', 'Sarah Nakato', 'Sara Nakatto', 'Peter Mukasa')
+    ])
+
+    candidates, _ = find_duplicates(collection)
+
+    pairs = {frozenset(member['name'] for member in candidate['members']) for candidate in candidates}
+    assert pairs == {frozenset({'John Kato', 'Jon Kato'}), frozenset({'Sarah Nakato', 'Sara Nakatto'})}
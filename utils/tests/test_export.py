@@ -0,0 +1,33 @@
+import mongomock
+from family_import import export_members, run_import
+from test_reader import write_sheet
+
+FIELDS = ('name', 'dob', 'phone', 'occupation', 'address', 'image')
+
+def members_by_name(collection):
+    docs = {doc['_id']: doc for doc in collection.find()}
+    return {
+        doc['name']: (
+            tuple(doc.get(field) for field in FIELDS),
+            docs[doc['spouse']]['name'] if doc.get('spouse') else None,
+            sorted(docs[child_id]['name'] for child_id in doc['children']),
+        )
+        for doc in docs.values()
+    }
+
+def test_csv_export_round_trips(tmp_path):
+    sheet = tmp_path / 'family.csv'
+    write_sheet(sheet, [
+        ['IMG_1', 'John & Mary', '1. Kampala\n2. Entebbe', 'John Kato', '01/02/1960', 'Farmer', '0772123456',
+         'Mary Kato', '03/04/1962', 'Teacher', '0701000222'],
+    ])
+    collection = mongomock.MongoClient().famtree.members
+    run_import(str(sheet), collection, mode='bulk')
+
+    exported = tmp_path / 'export.csv'
+    export_members(collection, str(exported))
+    restored = mongomock.MongoClient().famtree.members
+    run_import(str(exported), restored, mode='bulk')
+
+    assert members_by_name(restored) == members_by_name(collection)
+    assert restored.find_one({'name': 'John Kato'})['phone'] == '0772123456'
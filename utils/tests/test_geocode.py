@@ -0,0 +1,65 @@
+import mongomock
+from urllib.error import URLError
+from family_import import FakeGeocoder, GeocodeCache, geocode_members
+from family_import.geocode import geocode_addresses
+
+class FailingGeocoder(FakeGeocoder):
+    """Fails on the given addresses the way GoogleGeocoder does on quota or network errors."""
+
+    def __init__(self, failing, error):
+        super().__init__()
+        self.failing = failing
+        self.error = error
+
+    def __call__(self, address):
+        if address in self.failing:
+            self.calls.append(address)
+            raise self.error
+        return super().__call__(address)
+
+def members(*addresses):
+    collection = mongomock.MongoClient().famtree.members
+    collection.insert_many([{'name': f'Member {n}', 'address': address} for n, address in enumerate(addresses)])
+    return collection
+
+def test_cache_hits_and_cached_misses(tmp_path):
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite'))
+    geocoder = FakeGeocoder({'Nowhere': None})
+
+    first, counts = geocode_addresses(['Kampala', ' kampala. ', 'Nowhere'], geocoder, cache)
+    again, again_counts = geocode_addresses(['Kampala', 'Nowhere'], FakeGeocoder(), cache)
+
+    assert geocoder.calls == ['Kampala', 'Nowhere']
+    assert counts == {'addresses': 2, 'cache_hits': 0, 'geocoded': 2, 'failed': 0, 'error': None}
+    assert again_counts['cache_hits'] == 2 and again_counts['geocoded'] == 0
+    assert again == first and again['nowhere'] is None
+
+def test_unchanged_addresses_are_skipped(tmp_path):
+    collection = members('Kampala', 'Entebbe')
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite'))
+
+    first = geocode_members(collection, FakeGeocoder(), cache)
+    collection.update_one({'address': 'Entebbe'}, {'$set': {'address': 'Jinja'}})
+    geocoder = FakeGeocoder()
+    second = geocode_members(collection, geocoder, cache)
+
+    assert first['members_updated'] == 2
+    assert geocoder.calls == ['Jinja']
+    assert second['members_updated'] == 1
+    assert collection.find_one({'address': 'Jinja'})['location_key'] == 'jinja'
+
+def test_failures_are_counted_and_retried(tmp_path):
+    collection = members('Kampala', 'Entebbe', 'Jinja')
+    cache = GeocodeCache(str(tmp_path / 'cache.sqlite'))
+
+    failing = FailingGeocoder({'Entebbe'}, RuntimeError("Geocoding failed for 'Entebbe': OVER_QUERY_LIMIT"))
+    first = geocode_members(collection, failing, cache)
+    offline = FailingGeocoder({'Entebbe'}, URLError('network down'))
+    geocode_members(collection, offline, cache)
+    retried = geocode_members(collection, FakeGeocoder(), cache)
+
+    assert first['failed'] == 1 and first['members_updated'] == 2
+    assert 'OVER_QUERY_LIMIT' in first['error']
+    assert offline.calls == ['Entebbe']
+    assert retried['members_updated'] == 1
+    assert collection.count_documents({'location': {'$exists': True}}) == 3
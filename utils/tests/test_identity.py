@@ -0,0 +1,49 @@
+import mongomock
+import pandas as pd
+import pytest
+from datetime import datetime
+from family_import import run_import
+from family_import.identity import IDENTITY_FIELD, dob_key, fold_name, load_identities
+from test_reader import write_sheet
+
+@pytest.mark.parametrize('mode', ['sequential', 'bulk', 'plan'])
+def test_reimport_finds_members_renamed_by_the_backend(tmp_path, mode):
+    collection = mongomock.MongoClient().famtree.members
+    first = tmp_path / 'first.csv'
+    write_sheet(first, [['', '', '', 'John Kato', '01/02/1960', 'Farmer', '', 'Mary Kato', '', '', '']])
+    run_import(str(first), collection, mode)
+    # The backend's PUT /api/members/:id sets name and leaves name_key alone
+    collection.update_one({'name': 'John Kato'}, {'$set': {'name': 'John B. Kato'}})
+
+    second = tmp_path / 'second.csv'
+    write_sheet(second, [['', '', '', 'John B. Kato', '01/02/1960', 'Teacher', '', 'Mary Kato', '', '', '']])
+    run_import(str(second), collection, mode)
+
+    assert collection.count_documents({}) == 2
+    john = collection.find_one({'name': 'John B. Kato'})
+    assert john['occupation'] == 'Teacher'
+    assert john[IDENTITY_FIELD] == 'john b. kato'
+
+def test_load_identities_rewrites_stale_keys():
+    collection = mongomock.MongoClient().famtree.members
+    collection.insert_many([
+        {'name': 'Sarah  Nakato', IDENTITY_FIELD: 'sarah', 'dob': None},
+        {'name': 'Peter Mukasa', 'dob': None},
+    ])
+
+    identities = load_identities(collection)
+
+    assert set(identities) == {('sarah nakato', None), ('peter mukasa', None)}
+    assert sorted(doc[IDENTITY_FIELD] for doc in collection.find()) == ['peter mukasa', 'sarah nakato']
+
+def test_fold_name_ignores_case_and_spacing():
+    assert fold_name('  Sarah   NAKATO ') == fold_name('sarah nakato') == 'sarah nakato'
+    assert fold_name('Sarah Nakato') != fold_name('Nakato Sarah')
+
+def test_dob_key_matches_sheet_and_stored_dates():
+    stored = datetime(1960, 2, 1)
+    assert dob_key(pd.Timestamp('1960-02-01')) == stored
+    assert dob_key(stored) == stored
+    assert dob_key(None) is None
+    assert dob_key(pd.NaT) is None
+    assert dob_key(float('nan')) is None
@@ -0,0 +1,19 @@
+import mongomock
+from family_import import link_member_images, run_import
+from test_reader import write_sheet
+
+def test_import_keeps_linked_public_ids(tmp_path):
+    sheet = tmp_path / 'family.csv'
+    write_sheet(sheet, [
+        ['http://res.cloudinary.com/demo/image/upload/v123/IMG_3457.jpg', '', '', 'John Kato', '01/02/1960', '', '',
+         'Mary Kato', '', '', ''],
+    ])
+    collection = mongomock.MongoClient().famtree.members
+    run_import(str(sheet), collection, mode='bulk')
+
+    assert {doc['image'] for doc in collection.find()} == {'IMG_3457'}
+    summary = link_member_images(collection, lookup=lambda ids: [{'public_id': public_id} for public_id in ids])
+    assert summary['members_updated'] == 0
+
+    plan = run_import(str(sheet), collection, mode='plan', dry_run=True)['plan']
+    assert plan.summary()['updates'] == 0
@@ -0,0 +1,37 @@
+import mongomock
+from family_import import run_import
+from test_reader import write_sheet
+
+ROWS = [
+    ['', '', '', 'John Kato', '01/02/1960', 'Farmer', '', 'Mary Kato', '03/04/1962', '', ''],
+    ['', '', '', 'Peter Mukasa', '05/06/1970', 'Driver', '', 'Ruth Mukasa', '', '', ''],
+    ['', '', '', 'Paul Ssebo', '', '', '', 'Jane Ssebo', '', '', ''],
+]
+
+def import_rows(tmp_path, collection, rows):
+    sheet = tmp_path / 'family.csv'
+    write_sheet(sheet, rows)
+    return run_import(str(sheet), collection, 'incremental', state_path=str(tmp_path / 'state.json'))['summary']
+
+def test_only_changed_rows_are_written(tmp_path):
+    collection = mongomock.MongoClient().famtree.members
+
+    first = import_rows(tmp_path, collection, ROWS)
+    unchanged = import_rows(tmp_path, collection, ROWS)
+    changed = [ROWS[0], ROWS[1][:5] + ['Pilot'] + ROWS[1][6:], ROWS[2]]
+    edited = import_rows(tmp_path, collection, changed)
+
+    assert first == {'rows': 3, 'rows_added': 3, 'rows_removed': 0, 'members_written': 6, 'links_written': 6}
+    assert unchanged['rows_added'] == unchanged['rows_removed'] == unchanged['members_written'] == 0
+    assert edited['rows_added'] == 1 and edited['rows_removed'] == 1
+    assert edited['members_written'] == 2
+    assert collection.find_one({'name': 'Peter Mukasa'})['occupation'] == 'Pilot'
+
+def test_removed_rows_are_detected(tmp_path):
+    collection = mongomock.MongoClient().famtree.members
+    import_rows(tmp_path, collection, ROWS)
+
+    summary = import_rows(tmp_path, collection, ROWS[:2])
+
+    assert summary['rows'] == 2
+    assert summary['rows_added'] == 0 and summary['rows_removed'] == 1
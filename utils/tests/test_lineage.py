@@ -0,0 +1,45 @@
+import mongomock
+from family_import import build_lineage, store_lineage
+
+def family(**links):
+    """Member documents from name=(spouse, [children]) pairs, using the names as _ids."""
+    return {name: {'_id': name, 'name': name, 'spouse': spouse, 'children': children}
+            for name, (spouse, children) in links.items()}
+
+def test_ancestors_generations_and_descendants():
+    members = family(
+        grandpa=('grandma', ['father']), grandma=('grandpa', ['father']),
+        father=('mother', ['child']), mother=('father', ['child']), child=(None, []),
+    )
+
+    lineage, cyclic = build_lineage(members)
+
+    assert cyclic == []
+    assert lineage['child']['ancestors'][:2] in (['grandpa', 'grandma'], ['grandma', 'grandpa'])
+    assert set(lineage['child']['ancestors']) == {'grandpa', 'grandma', 'father', 'mother'}
+    assert [lineage[name]['generation'] for name in ('grandpa', 'mother', 'child')] == [0, 1, 2]
+    assert lineage['grandpa']['descendants'] == 2 and lineage['child']['descendants'] == 0
+
+def test_cycles_are_left_out():
+    members = family(
+        root=(None, ['a']), a=(None, ['b']), b=(None, ['a', 'below']), below=(None, []),
+        other=(None, []),
+    )
+
+    lineage, cyclic = build_lineage(members)
+
+    assert sorted(cyclic) == ['a', 'b', 'below']
+    for name in cyclic:
+        assert lineage[name] == {'ancestors': [], 'generation': None, 'descendants': 0}
+    assert lineage['root']['generation'] == 0 and lineage['other']['generation'] == 0
+
+def test_store_lineage_writes_only_changes():
+    collection = mongomock.MongoClient().famtree.members
+    collection.insert_many(list(family(a=(None, ['b']), b=(None, [])).values()))
+
+    first = store_lineage(collection)
+    second = store_lineage(collection)
+
+    assert first['members_updated'] == 2 and first['generations'] == 2
+    assert second['members_updated'] == 0
+    assert collection.find_one({'_id': 'b'})['ancestors'] == ['a']
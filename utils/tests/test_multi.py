@@ -0,0 +1,42 @@
+import mongomock
+from family_import import ImportStats, parse_sheets, run_import
+from test_reader import write_sheet
+
+def write_batch(directory, count):
+    directory.mkdir()
+    paths = []
+    for number in range(count):
+        path = directory / f'branch{number}.csv'
+        write_sheet(path, [
+            ['', '', '', f'Head {number}', '01/01/1950', '', '', f'Spouse {number}', '', '', ''],
+        ])
+        paths.append(str(path))
+    return paths
+
+def test_parse_sheets_keeps_path_order(tmp_path):
+    paths = write_batch(tmp_path / 'branches', 5)
+
+    chunks = list(parse_sheets(paths, workers=2))
+
+    assert [members[0].name for chunk in chunks for _, _, members in chunk] == [f'Head {n}' for n in range(5)]
+
+def test_incremental_batch_reparses_instead_of_holding_the_batch(tmp_path):
+    write_batch(tmp_path / 'branches', 3)
+    collection = mongomock.MongoClient().famtree.members
+    state_path = str(tmp_path / 'state.json')
+
+    first = run_import(str(tmp_path / 'branches'), collection, mode='incremental', state_path=state_path, workers=2)
+    second = run_import(str(tmp_path / 'branches'), collection, mode='incremental', state_path=state_path, workers=2)
+
+    assert first['summary']['rows_added'] == 3
+    assert second['summary']['members_written'] == 0
+    assert collection.count_documents({}) == 6
+
+def test_worker_stages_are_reported(tmp_path):
+    paths = write_batch(tmp_path / 'branches', 3)
+    stats = ImportStats()
+
+    list(parse_sheets(paths, workers=2, stats=stats))
+
+    assert {'parse', 'read', 'normalize'} <= set(stats.report()['stages_s'])
+    assert stats.stages['normalize'] > 0
@@ -0,0 +1,55 @@
+import mongomock
+import pytest
+from benchmark_import import generate_sheet
+from family_import import MODES, iter_row_chunks, run_import
+
+def documents(collection):
+    """The members with their _ids and links replaced by names, so runs can be compared."""
+    docs = list(collection.find())
+    names = {doc['_id']: doc['name'] for doc in docs}
+    return sorted(
+        (
+            {
+                **{field: value for field, value in doc.items() if field != '_id'},
+                'spouse': names.get(doc['spouse']),
+                'children': [names[child_id] for child_id in doc['children']],
+            }
+            for doc in docs
+        ),
+        key=lambda doc: (doc['name'], str(doc['dob'])),
+    )
+
+@pytest.fixture(scope='module')
+def sheet(tmp_path_factory):
+    path = tmp_path_factory.mktemp('sheet') / 'family.xlsx'
+    generate_sheet(path, 60, seed=3)
+    return path
+
+def seeded_collection(sheet):
+    """A collection already holding one member of the sheet with an outdated occupation."""
+    collection = mongomock.MongoClient().famtree.members
+    _, _, members = next(iter_row_chunks(sheet))[0]
+    collection.insert_one({'name': members[0].name, 'dob': members[0].dob, 'occupation': 'Retired',
+                           'spouse': None, 'children': []})
+    return collection
+
+def import_twice(sheet, mode, tmp_path):
+    collection = seeded_collection(sheet)
+    state_path = str(tmp_path / f'{mode}.state.json')
+    results = []
+    for _ in range(2):
+        run_import(str(sheet), collection, mode, rows_per_chunk=7, chunk_size=25, state_path=state_path)
+        results.append(documents(collection))
+    return results
+
+def test_every_mode_leaves_the_same_state(sheet, tmp_path):
+    states = {}
+    for mode in MODES:
+        first, second = import_twice(sheet, mode, tmp_path)
+        assert first == second, f"{mode} is not idempotent"
+        states[mode] = first
+
+    for mode in MODES:
+        assert states[mode] == states['sequential'], f"{mode} differs from sequential"
+    assert any(doc['children'] for doc in states['sequential'])
+    assert 'Retired' not in {doc['occupation'] for doc in states['sequential']}
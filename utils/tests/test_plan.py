@@ -0,0 +1,33 @@
+import mongomock
+from family_import import run_import
+from test_reader import write_sheet
+
+ROWS = [
+    ['', '', '', 'John Kato', '01/02/1960', 'Farmer', '0772123456', 'Mary Kato', '03/04/1962', '', ''],
+    ['', '', '', 'Peter Mukasa', '05/06/1970', 'Driver', '', 'Ruth Mukasa', '', '', ''],
+]
+
+def plan(tmp_path, collection, rows, dry_run=True):
+    sheet = tmp_path / 'family.csv'
+    write_sheet(sheet, rows)
+    return run_import(str(sheet), collection, 'plan', chunk_size=3, dry_run=dry_run)['plan'].summary(chunk_size=3)
+
+def test_dry_run_plans_inserts_without_writing(tmp_path):
+    collection = mongomock.MongoClient().famtree.members
+
+    summary = plan(tmp_path, collection, ROWS)
+
+    assert collection.count_documents({}) == 0
+    assert summary['inserts'] == 4 and summary['updates'] == 0
+    assert summary['operations'] == 4 and summary['bulk_writes'] == 2
+    assert summary['estimated_bytes'] > 0
+
+def test_applied_plan_leaves_nothing_to_do(tmp_path):
+    collection = mongomock.MongoClient().famtree.members
+    plan(tmp_path, collection, ROWS, dry_run=False)
+
+    again = plan(tmp_path, collection, ROWS)
+    edited = plan(tmp_path, collection, [ROWS[0][:5] + ['Teacher'] + ROWS[0][6:], ROWS[1]])
+
+    assert again['inserts'] == again['updates'] == 0 and again['unchanged'] == 4
+    assert edited['updates'] == 1 and edited['field_changes'] == 1 and edited['relationship_changes'] == 0
@@ -0,0 +1,25 @@
+import csv
+from family_import import iter_row_chunks
+
+COLUMNS = ['Images', 'Name', 'Address', 'Name1', 'Date of Birth1', 'Occupation1', 'Phone1',
+           'Name2', 'Date of Birth2', 'Occupation2', 'Phone2']
+
+def write_sheet(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
+
+def test_csv_phones_keep_leading_zero(tmp_path):
+    path = tmp_path / 'family.csv'
+    write_sheet(path, [
+        ['', 'John & Mary', 'Kampala', 'John Kato', '01/02/1960', 'Farmer', '0772123456',
+         'Mary Kato', '', '', '256772000111'],
+    ])
+
+    rows = [row for chunk in iter_row_chunks(path) for row in chunk]
+
+    _, _, members = rows[0]
+    assert [member.phone for member in members] == ['0772123456', '256772000111']
+    assert members[0].dob.year == 1960
+    assert members[1].dob is None